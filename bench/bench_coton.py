@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Mesures de performance de Coton
+
+Chaque scénario fait circuler des données d'un producteur vers un ou
+plusieurs consommateurs via le GrandMamamouchi, et mesure le débit ainsi que
+la latence entre publication et appel du point d'entrée consommateur.
+
+Les résultats sont produits au format JSON, et peuvent être comparés à ceux
+d'une exécution précédente :
+
+  ./bench_coton.py --sortie avant.json
+  …
+  ./bench_coton.py --référence avant.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import threading
+import time
+
+import coton
+
+
+def charge(taille):
+    """Donnée de test, de taille croissante
+    """
+    if taille == "entier":
+        return 12
+    elif taille == "liste":
+        return list(range(16))
+    elif taille == "octets":
+        return bytes(64 * 1024)
+    elif taille == "imbriquée":
+        return {"pistes": [{"id": i, "position": (i, 2.0 * i, 3.0 * i),
+                            "historique": list(range(32))}
+                           for i in range(256)]}
+    raise ValueError(taille)
+
+
+def centile(valeurs, p):
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(p / 100.0 * len(valeurs)))]
+
+
+def système(nb_messages, nb_consommateurs, taille, immédiat, intervalle):
+    """Déclaration d'un producteur et de ses consommateurs
+
+    Chaque donnée est accompagnée de son heure de publication.
+    """
+    coton.réinitialiser()
+    donnée = charge(taille)
+    latences = list()
+    verrou = threading.Lock()
+    restants = [nb_messages * nb_consommateurs]
+    bornes = dict()
+
+    def produire(self):
+        if self.n >= nb_messages:
+            coton.dormir(0.01)
+            return
+        if self.n == 0:
+            bornes["début"] = time.perf_counter()
+        self.n += 1
+        self.valeur = (time.perf_counter_ns(), donnée)
+        if intervalle:
+            coton.dormir(intervalle)
+
+    def init_producteur(self):
+        self.n = 0
+
+    sortie = coton.send_msg("Donnée", immediate=immédiat, system_name="donnée")
+    coton.MétaActeur("Producteur", (), {
+        "valeur": sortie,
+        "__init__": init_producteur,
+        "produire": coton.entry(produire)})
+
+    def consommer(self):
+        latence = time.perf_counter_ns() - self.valeur[0]
+        with verrou:
+            latences.append(latence)
+            restants[0] -= 1
+            if restants[0] == 0:
+                bornes["fin"] = time.perf_counter()
+                coton.arrêter()
+
+    for i in range(nb_consommateurs):
+        entrée = coton.recv_msg("Donnée", system_name="donnée")
+        coton.MétaActeur("Consommateur{}".format(i), (), {
+            "valeur": entrée,
+            "consommer": coton.entry(entrée)(consommer)})
+
+    return latences, bornes
+
+
+def scénario(nom, ordonnanceur, nb_messages, nb_consommateurs=1,
+             taille="entier", immédiat=True, intervalle=0.0, délai=120.0):
+    latences, bornes = système(nb_messages, nb_consommateurs, taille,
+                               immédiat, intervalle)
+    coton.GM.démarrer(ordonnanceur)
+    terminé = coton.GM.attendre(délai)
+    if not terminé:
+        coton.arrêter()
+    durée = bornes.get("fin", time.perf_counter()) - bornes.get("début", 0.0)
+
+    reçus = len(latences)
+    return {
+        "scénario": nom,
+        "paramètres": {
+            "ordonnanceur": ordonnanceur,
+            "messages": nb_messages,
+            "consommateurs": nb_consommateurs,
+            "taille": taille,
+            "immédiat": immédiat,
+            "intervalle": intervalle,
+        },
+        "terminé": terminé,
+        "reçus": reçus,
+        "durée_s": durée,
+        "débit_msg_s": reçus / durée if durée > 0 else None,
+        "latence_p50_us": _micro(centile(latences, 50)),
+        "latence_p99_us": _micro(centile(latences, 99)),
+    }
+
+
+def _micro(ns):
+    return None if ns is None else ns / 1000.0
+
+
+def file_sortie(nb_opérations):
+    """Coût propre de FileSortie : empilement puis vidage d'une activation
+    produisant 8 données différées dont 4 coalescées
+    """
+    f = coton.FileSortie()
+    début = time.perf_counter()
+    for i in range(nb_opérations):
+        for j in range(8):
+            f.push("donnée{}".format(j % 4), j, False)
+        for _ in f:
+            pass
+        f.clear()
+    durée = time.perf_counter() - début
+    return {
+        "scénario": "file_sortie",
+        "paramètres": {"activations": nb_opérations},
+        "terminé": True,
+        "durée_s": durée,
+        "débit_msg_s": 8 * nb_opérations / durée,
+    }
+
+
+def campagne(ordonnanceur, rapide):
+    n = 2000 if rapide else 20000
+    résultats = list()
+    résultats.append(scénario("débit", ordonnanceur, n))
+    résultats.append(scénario("latence", ordonnanceur, n // 10,
+                              intervalle=0.0005))
+    for nb in (1, 10, 100) if rapide else (1, 10, 100, 1000):
+        résultats.append(scénario("diffusion", ordonnanceur,
+                                  max(n // nb, 20), nb_consommateurs=nb))
+    for taille in ("entier", "liste", "octets", "imbriquée"):
+        résultats.append(scénario("taille", ordonnanceur, n // 10,
+                                  taille=taille))
+    for immédiat in (True, False):
+        résultats.append(scénario("émission", ordonnanceur, n,
+                                  immédiat=immédiat))
+    résultats.append(file_sortie(n * 10))
+    return résultats
+
+
+def clé(résultat):
+    return json.dumps([résultat["scénario"], résultat["paramètres"]],
+                      sort_keys=True)
+
+
+def comparer(résultats, référence, tolérance):
+    """Affichage de l'évolution du débit, et retour du nombre de régressions
+    """
+    anciens = {clé(r): r for r in référence["résultats"]}
+    régressions = 0
+    for r in résultats:
+        ancien = anciens.get(clé(r))
+        if ancien is None or not ancien.get("débit_msg_s") \
+                or not r.get("débit_msg_s"):
+            continue
+        rapport = r["débit_msg_s"] / ancien["débit_msg_s"]
+        marque = ""
+        if rapport < 1.0 - tolérance:
+            marque = "  ← RÉGRESSION"
+            régressions += 1
+        print("{:10} {:60} {:6.2f}{}".format(
+            r["scénario"], json.dumps(r["paramètres"], ensure_ascii=False),
+            rapport, marque), file=sys.stderr)
+    return régressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ordonnanceur", default="tâches")
+    parser.add_argument("--rapide", action="store_true",
+                        help="campagne réduite")
+    parser.add_argument("--sortie", help="fichier JSON des résultats")
+    parser.add_argument("--référence",
+                        help="résultats JSON d'une exécution précédente")
+    parser.add_argument("--tolérance", type=float, default=0.2,
+                        help="baisse de débit relative tolérée")
+    args = parser.parse_args()
+
+    résultats = {
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "résultats": campagne(args.ordonnanceur, args.rapide),
+    }
+
+    texte = json.dumps(résultats, ensure_ascii=False, indent=2)
+    if args.sortie:
+        with open(args.sortie, "w") as f:
+            f.write(texte)
+    else:
+        print(texte)
+
+    if args.référence:
+        with open(args.référence) as f:
+            référence = json.load(f)
+        if comparer(résultats["résultats"], référence, args.tolérance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
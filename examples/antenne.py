@@ -6,10 +6,10 @@
 import enum
 import math
 import random
-import time
 
 from geo import Vec3
 from coton import MétaActeur, send_msg, recv_msg, entry, run
+from coton import heure, dormir
 
 
 class StatutAlignement(enum.Enum):
@@ -159,19 +159,19 @@ class Horloge(metaclass=MétaActeur):
 
     @entry
     def générer(self):
-        heure = time.time()
+        maintenant = heure()
         if self._échéance is None:
             attente = Horloge.PÉRIODE
-            self._échéance = heure + Horloge.PÉRIODE
+            self._échéance = maintenant + Horloge.PÉRIODE
             self.tic = 0
-        elif heure < self._échéance:
-            attente = self._échéance - heure
+        elif maintenant < self._échéance:
+            attente = self._échéance - maintenant
         else:
             self.tic += 1
             self._échéance += Horloge.PÉRIODE
-            attente = max(self._échéance - heure, 0.0)
+            attente = max(self._échéance - maintenant, 0.0)
         if attente > 0.0:
-            time.sleep(attente)
+            dormir(attente)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,6 @@
 """Démonstration de réception sur une interface d'émission
 """
 
-import time
 import coton
 
 
@@ -13,11 +12,10 @@ class Horloge(metaclass=coton.MétaActeur):
 
     tic = coton.send_msg("Heure système", 0)
 
-    @coton.entry
+    @coton.entry(every=1.0)
     def émettre(self):
         """Produit un tic à 1Hz
         """
-        time.sleep(1)
         self.tic += 1
 
 
@@ -10,8 +10,6 @@ J'ai reçu : [1, 1, 1, 2]
 …
 """
 
-import time
-
 import coton
 
 
@@ -29,7 +27,8 @@ class Producteur(metaclass=coton.MétaActeur):
         self.liste.extend([1, 2])
         coton.publier(self, Producteur.liste)
 
-        time.sleep(1)
+        # Reprise dans une seconde, sans immobiliser de tâche
+        yield coton.Délai(1)
 
 
 class Consommateur(metaclass=coton.MétaActeur):
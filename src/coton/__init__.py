@@ -4,15 +4,160 @@
 """
 
 import collections
+import collections.abc
 import functools
-import pickle
+import inspect
+import itertools
 import queue
 import threading
 import time
 
+from . import trace
+from .coopération import Condition, Coopération, Délai, Réception  # noqa: F401
+from .différentiel import DÉSYNCHRONISÉ, Différence, Émetteur, reconstruire
+from .journal import Enregistreur
+from .mesures import Mesures
+from .temps import HorlogeRéelle, HorlogeVirtuelle, Minuteur
+from .codage import Codec, CodecCopie, CodecDirect, CodecPickle  # noqa: F401
+from .codage import figé, immuable  # noqa: F401
+from .partage import CodecPartagé, VuePartagée  # noqa: F401
+
 
 Échange = collections.namedtuple("Échange", ["producteurs", "consommateurs"])
 
+# Destinataires d'une donnée émise par une instance : instances recevant
+# toutes ses valeurs, types consommateurs (nom, instances, répartition) dont
+# une seule instance reçoit chaque valeur, et liens vers d'autres systèmes ;
+# enfin, filtres et cadences des instances destinataires dont la réception est
+# restreinte, et ensemble des instances ne recevant pas toutes les valeurs
+Destinations = collections.namedtuple(
+    "Destinations", ["fixes", "réparties", "distants", "filtrés", "cadencés",
+                     "partiels"])
+
+# Politiques de limitation d'une boîte
+BLOQUER = "bloquer"
+ÉCARTER = "écarter"
+FUSIONNER = "fusionner"
+
+# Politiques de répartition d'un échange entre les instances d'un même type
+DIFFUSION = "diffusion"
+TOURNIQUET = "tourniquet"
+
+# Codec des échanges déclarés immuables, commun à tous leurs producteurs
+_CODEC_IMMUABLE = CodecDirect()
+
+
+class Partition:
+    """Répartition d'un échange selon une clé extraite de la donnée
+
+    Les données de même clé sont toujours remises à la même instance.
+
+    clé → nom d'attribut ou clé d'indexation de la donnée, ou fonction
+          extrayant la clé de la donnée
+    """
+
+    def __init__(self, clé):
+        self._clé = clé
+
+    def indice(self, valeur, nombre):
+        if callable(self._clé):
+            clé = self._clé(valeur)
+        else:
+            clé = _champ(valeur, self._clé)
+        return hash(clé) % nombre
+
+
+def _champ(valeur, champ):
+    """Champ d'une donnée : clé d'indexation ou nom d'attribut
+    """
+    if isinstance(valeur, collections.abc.Mapping):
+        return valeur[champ]
+    else:
+        return getattr(valeur, champ)
+
+
+def _prédicat(filtre):
+    """Prédicat d'un filtre : fonction, ou dictionnaire champ → valeur
+    attendue
+    """
+    if filtre is None or callable(filtre):
+        return filtre
+    attendus = tuple(filtre.items())
+
+    def prédicat(valeur):
+        try:
+            return all(_champ(valeur, c) == v for c, v in attendus)
+        except (KeyError, AttributeError, TypeError):
+            return False
+    return prédicat
+
+
+class _Cadence:
+    """Limitation des données d'un échange remises à une instance : une sur
+    `pas`, et au plus `rythme` par seconde
+
+    Une donnée arrivée trop tôt est retenue, remplaçant la précédente, puis
+    remise à l'échéance par le minuteur du système. Elle est codée dès sa
+    retenue, par la tâche du producteur : le consommateur reçoit donc bien
+    la valeur émise, quoi qu'en fasse ensuite le producteur.
+    """
+
+    def __init__(self, nom, nom_échange, rythme, pas):
+        self.nom = nom
+        self.nom_échange = nom_échange
+        self._intervalle = 1.0 / rythme if rythme else 0.0
+        self._pas = pas or 1
+        self._rang = 0
+        self._échéance = 0.0
+        self._retenue = None
+        self._verrou = threading.Lock()
+
+    def admettre(self, gm, producteur, valeur, codée):
+        """Vrai si la donnée est à remettre sans attendre
+
+        codée → la donnée est déjà codée
+        """
+        with self._verrou:
+            rang = self._rang
+            self._rang = (rang + 1) % self._pas
+            if rang or not self._intervalle:
+                return not rang
+
+            heure = gm._horloge.repère()
+            if heure >= self._échéance and self._retenue is None:
+                self._échéance = heure + self._intervalle
+                return True
+            remplacée = self._retenue
+            if remplacée is None:
+                gm._minuteur.programmer(functools.partial(self._échoir, gm),
+                                        self._échéance - heure)
+            if not codée:
+                # Remise comptée seulement une fois effective (voir
+                # GrandMamamouchi._relâcher)
+                valeur = gm._coder(producteur, self.nom_échange,
+                                   gm.codec(self.nom_échange), valeur, 1, 0)
+            self._retenue = (producteur, valeur)
+        if remplacée is not None:
+            _abandonner((self.nom_échange, remplacée[1]))
+        return False
+
+    def _échoir(self, gm):
+        with self._verrou:
+            if self._retenue is None:
+                return
+            producteur, valeur_codée = self._retenue
+            self._retenue = None
+            self._échéance = gm._horloge.repère() + self._intervalle
+        gm._relâcher(producteur, self.nom_échange, valeur_codée, self.nom)
+
+    def abandonner(self):
+        """Renoncement à la donnée retenue, le système s'arrêtant
+        """
+        with self._verrou:
+            retenue, self._retenue = self._retenue, None
+        if retenue is not None:
+            _abandonner((self.nom_échange, retenue[1]))
+
 
 class GrandMamamouchi:
     """Contexte d'exécution, ordonnanceur, etc.
@@ -23,71 +168,669 @@ class GrandMamamouchi:
         self._échanges = dict()
         self._instances = dict()
         self._files = dict()
-        self._tâches = dict()
         self._entrées = dict()
         self._sorties = dict()
+        self._routages = dict()
+        self._répliques = dict()
+        self._type_de = dict()
+        self._limites = dict()
+        self._tourniquets = collections.defaultdict(itertools.count)
+        self._plan = dict()
+        self._liens = dict()
+        self._cadences = dict()
+        self._verrou = threading.Lock()
+        self._codec = CodecPickle()
+        self._codecs = dict()
+        self._priorités = dict()
+        self._différentiels = dict()
+        self._émetteurs = dict()
+        self._traceur = trace.Traceur()
+        self._ordonnanceur = None
+        self._fin = threading.Event()
+        self._horloge = HorlogeRéelle()
+        self._minuteur = Minuteur(self._horloge)
+        self._mesures = Mesures()
+        self._journal = None
 
     def ajouter(self, typ):
         """Mémorise le type comme faisant partie du système
         """
         self._types[typ.__name__] = typ
+        self._plan.clear()
+
+        # Table de routage nom système → descripteur, construite une fois pour
+        # toutes afin que la distribution d'un message soit un simple accès
+        routage = dict()
         for nom, att in typ.__dict__.items():
+            if not isinstance(att, (recv_msg, send_msg, _Minuterie)):
+                continue
+            nom_système = att.system_name
+            if nom_système in routage:
+                print("ERREUR : l'Acteur {!r} déclare plusieurs fois l'échange"
+                      " {!r} ({} et {})".format(
+                          typ.__name__, nom_système,
+                          routage[nom_système]._name[1:], nom))
+                continue
+            routage[nom_système] = att
+            if isinstance(att, _Minuterie):
+                # Pseudo-échange interne au type, sans donnée à coder
+                self._codecs[nom_système] = _CODEC_IMMUABLE
+                continue
+            if att._codec is not None:
+                codec = self._codecs.setdefault(nom_système, att._codec)
+                if codec is not att._codec:
+                    print("ERREUR : codecs incompatibles pour l'échange {!r}"
+                          " ({})".format(nom_système, typ.__name__))
+            if isinstance(att, send_msg) and att._delta:
+                self._différentiels[nom_système] = (
+                    64 if att._delta is True else att._delta)
+            if isinstance(att, send_msg) and att._priority is not None:
+                priorité = self._priorités.setdefault(nom_système,
+                                                      att._priority)
+                if priorité != att._priority:
+                    print("ERREUR : priorités incompatibles pour l'échange"
+                          " {!r} ({})".format(nom_système, typ.__name__))
+            échange = self._échanges.setdefault(nom_système, Échange(
+                set(), set()))
             if isinstance(att, recv_msg):
-                self._échanges.setdefault(nom, Échange(
-                    set(), set())).consommateurs.add(typ.__name__)
-            elif isinstance(att, send_msg):
-                self._échanges.setdefault(nom, Échange(
-                    set(), set())).producteurs.add(typ.__name__)
-
-        # Ajout des files d'entrée et de sortie
-        self._files[typ.__name__] = queue.Queue()
+                échange.consommateurs.add(typ.__name__)
+            else:
+                échange.producteurs.add(typ.__name__)
+        self._routages[typ.__name__] = routage
+
+        # Un échange immuable l'est pour tous ses producteurs, quel que soit
+        # l'ordre de leurs déclarations : aucun ne doit remettre par référence
+        # une valeur muable
+        for nom_système, att in routage.items():
+            if (isinstance(att, _Minuterie)
+                    or self._codecs.get(nom_système) is not _CODEC_IMMUABLE):
+                continue
+            for t in self._échanges[nom_système].producteurs:
+                self._routages[t][nom_système]._immutable = True
+
+        # Les types déjà déclarés recevant des données désormais prioritaires
+        # voient leurs boîtes réorganisées
+        for nom_système, att in routage.items():
+            if isinstance(att, send_msg) and att._priority is not None:
+                échange = self._échanges[nom_système]
+                for t in échange.consommateurs | échange.producteurs:
+                    if t in self._répliques:
+                        for nom in self._répliques[t]:
+                            self._files[nom].prioriser(self._priorités_de(t))
+
+        # Ajout des files d'entrée et de sortie, pour une instance unique
+        # jusqu'à nouvel ordre
         self._sorties[typ.__name__] = FileSortie()
+        self._limites[typ.__name__] = list()
+        self.répliquer(typ.__name__, 1)
+        for nom_système, att in routage.items():
+            if isinstance(att, recv_msg) and att._capacity is not None:
+                self.limiter(typ.__name__, att._capacity, att._policy,
+                             nom_système)
+
+    def répliquer(self, nom_type, nombre):
+        """Choix du nombre d'instances d'un type d'acteur
+
+        Les instances sont nommées d'après leur type : "Antenne" pour une
+        instance unique, "Antenne#0", "Antenne#1"… sinon.
+        """
+        if nombre < 1:
+            raise ValueError("Au moins une instance est nécessaire")
+        self._plan.clear()
+        for nom in self._répliques.get(nom_type, []):
+            del self._files[nom]
+            del self._type_de[nom]
+
+        if nombre == 1:
+            noms = [nom_type]
+        else:
+            noms = ["{}#{}".format(nom_type, i) for i in range(nombre)]
+        for nom in noms:
+            self._type_de[nom] = nom_type
+            self._files[nom] = self._nouvelle_boîte(nom_type)
+            self._sorties.setdefault(nom, FileSortie())
+        self._répliques[nom_type] = noms
+
+    def répliques(self, nom_type):
+        """Noms des instances d'un type d'acteur
+        """
+        return list(self._répliques[nom_type])
+
+    def _nouvelle_boîte(self, nom_type):
+        limites = self._limites[nom_type]
+        boîte = BoîteBornée() if limites else Boîte()
+        for capacité, politique, nom_échange in limites:
+            boîte.limiter(capacité, politique, nom_échange)
+        priorités = self._priorités_de(nom_type)
+        if priorités:
+            boîte.prioriser(priorités)
+        return boîte
+
+    def _priorités_de(self, nom_type):
+        """Priorités des échanges reçus par un type d'acteur : celle déclarée
+        par le consommateur, à défaut celle déclarée par le producteur
+        """
+        priorités = dict()
+        for nom_échange, att in self._routages[nom_type].items():
+            priorité = None
+            if isinstance(att, recv_msg):
+                priorité = att._priority
+            if priorité is None:
+                priorité = self._priorités.get(nom_échange)
+            if priorité:
+                priorités[nom_échange] = priorité
+        return priorités
+
+    def compiler(self):
+        """Figement du graphe des échanges en tables de destinations
+
+        Retourne la liste des échanges orphelins, sans producteur ou sans
+        consommateur. Un échange partagé par plusieurs producteurs, qui
+        reçoivent alors les valeurs les uns des autres, n'est pas orphelin.
+        """
+        self._plan.clear()
+        for nom, nom_type in self._type_de.items():
+            for nom_échange, att in self._routages[nom_type].items():
+                if isinstance(att, send_msg):
+                    self._planifier(nom, nom_échange)
+
+        orphelins = list()
+        for nom_échange, échange in sorted(self._échanges.items()):
+            liens = self._liens.values()
+            producteurs = ", ".join(sorted(échange.producteurs) + sorted(
+                lien.nom for lien in liens if nom_échange in lien.produits))
+            consommateurs = ", ".join(sorted(échange.consommateurs) + sorted(
+                lien.nom for lien in liens if nom_échange in lien.consommés))
+            nb_producteurs = self._nb_producteurs(échange) + sum(
+                nom_échange in lien.produits for lien in liens)
+            if not consommateurs and nb_producteurs < 2:
+                orphelins.append("l'échange {!r} n'a aucun consommateur"
+                                 " (produit par {})".format(nom_échange,
+                                                            producteurs))
+            if not producteurs:
+                orphelins.append("l'échange {!r} n'a aucun producteur"
+                                 " (consommé par {})".format(nom_échange,
+                                                             consommateurs))
+        return orphelins
+
+    def _nb_producteurs(self, échange):
+        """Nombre d'instances productrices d'un échange
+        """
+        return sum(len(self._répliques[t]) for t in échange.producteurs)
+
+    def _planifier(self, nom, nom_échange):
+        """Destinataires des données d'un échange émises par une instance
+        """
+        échange = self._échanges[nom_échange]
+        fixes = list()
+        réparties = list()
+        filtrés = dict()
+        cadencés = dict()
+        for t in sorted(échange.consommateurs):
+            répliques = tuple(self._répliques[t])
+            att = self._routages[t][nom_échange]
+            répartition = att._routing
+            if att._filter is not None:
+                filtrés.update((n, att._filter) for n in répliques)
+            if att._rate or att._every:
+                for n in répliques:
+                    cadencés[n] = self._cadences.setdefault(
+                        (n, nom_échange),
+                        _Cadence(n, nom_échange, att._rate, att._every))
+            if len(répliques) == 1 or répartition == DIFFUSION:
+                fixes.extend(répliques)
+            else:
+                réparties.append((t, répliques, répartition))
+        for t in sorted(échange.producteurs):
+            fixes.extend(n for n in self._répliques[t] if n != nom)
+
+        # Une donnée venue d'un autre système n'est pas relayée vers les
+        # autres : chaque système est directement relié à tous ceux dont il
+        # consomme les données
+        with self._verrou:
+            distants = tuple()
+            if nom not in self._liens:
+                distants = tuple(lien for _, lien in sorted(
+                    self._liens.items()) if nom_échange in lien.consommés)
+            partiels = frozenset(filtrés).union(cadencés, *(
+                répliques for _, répliques, _ in réparties))
+            destinations = Destinations(tuple(fixes), tuple(réparties),
+                                        distants, filtrés, cadencés,
+                                        partiels)
+            self._plan[(nom, nom_échange)] = destinations
+        return destinations
+
+    def relier(self, lien):
+        """Ajout d'un lien vers un autre système (voir coton.réseau)
+
+        Le lien présente un nom, les ensembles `consommés` et `produits` des
+        échanges de l'autre système, et une méthode `put` d'envoi des
+        messages.
+        """
+        with self._verrou:
+            self._liens[lien.nom] = lien
+            self._plan.clear()
+
+    def délier(self, nom):
+        """Retrait d'un lien vers un autre système
+        """
+        with self._verrou:
+            self._liens.pop(nom, None)
+            self._plan.clear()
+
+    def _répartir(self, nom_type, répliques, répartition, nom_échange,
+                  valeur):
+        """Instance d'un type consommateur destinataire d'une donnée
+        """
+        if répartition == TOURNIQUET:
+            i = next(self._tourniquets[(nom_échange, nom_type)])
+            return répliques[i % len(répliques)]
+        else:
+            return répliques[répartition.indice(valeur, len(répliques))]
+
+    def graphe(self):
+        """Graphe des échanges, au format DOT de Graphviz
+
+        Chaque type d'acteur est un nœud, chaque échange un arc de ses
+        producteurs vers ses consommateurs, ainsi que vers ses autres
+        producteurs. Les échanges orphelins aboutissent à un nœud signalé en
+        rouge.
+        """
+        lignes = ["digraph coton {"]
+        for nom_type in sorted(self._types):
+            nombre = len(self._répliques[nom_type])
+            étiquette = nom_type if nombre == 1 else "{} ×{}".format(
+                nom_type, nombre)
+            lignes.append("  {} [shape=box, label={}];".format(
+                _dot(nom_type), _dot(étiquette)))
+        for nom_échange, échange in sorted(self._échanges.items()):
+            producteurs = sorted(échange.producteurs)
+            consommateurs = sorted(échange.consommateurs)
+            partagé = self._nb_producteurs(échange) >= 2
+            if not producteurs or not (consommateurs or partagé):
+                orphelin = _dot("échange " + nom_échange)
+                lignes.append("  {} [shape=plaintext, fontcolor=red,"
+                              " label={}];".format(orphelin,
+                                                   _dot(nom_échange)))
+                producteurs = producteurs or [None]
+                consommateurs = consommateurs or [None]
+            for p in producteurs:
+                # Les producteurs d'un échange partagé, répliques comprises,
+                # reçoivent les valeurs les uns des autres
+                autres = [q for q in producteurs if partagé
+                          and (q != p or len(self._répliques[p]) > 1)]
+                for c in consommateurs + autres:
+                    lignes.append("  {} -> {} [label={}];".format(
+                        orphelin if p is None else _dot(p),
+                        orphelin if c is None else _dot(c),
+                        _dot(nom_échange)))
+        lignes.append("}")
+        return "\n".join(lignes) + "\n"
 
     def publier(self, nom, nom_échange, valeur, instantané):
-        h = time.time()
-        print("{}: {} → {}".format(h, nom, nom_échange))
+        if self._traceur.niveau >= trace.DÉTAIL:
+            self._traceur.tracer(trace.DÉTAIL, "{} → {}", nom, nom_échange)
         self._sorties[nom].push(nom_échange, valeur, instantané)
         if instantané:
             self.transmettre(nom, nom_échange, valeur)
 
-    def transmettre(self, nom, nom_échange, valeur):
-        échange = self._échanges[nom_échange]
-        valeur_codée = pickle.dumps(valeur)
-        for c in échange.consommateurs:
-            print("{}: {} → {}".format(nom_échange, nom, c))
-            q = self._files[c]
-            q.put((nom_échange, valeur_codée))
-        for c in [n for n in échange.producteurs if n != nom]:
-            print("{}: {} → {}".format(nom_échange, nom, c))
-            q = self._files[c]
-            q.put((nom_échange, valeur_codée))
+    def transmettre(self, nom, nom_échange, valeur, lots=None):
+        """Envoi d'une donnée à ses destinataires
+
+        lots → à défaut de remise immédiate, messages à remettre par
+               destinataire
+        """
+        destinations = self._plan.get((nom, nom_échange))
+        if destinations is None:
+            destinations = self._planifier(nom, nom_échange)
+        destinataires = self._destinataires(destinations, nom_échange, valeur)
+        if destinations.filtrés:
+            destinataires = self._filtrer(destinations.filtrés,
+                                          destinataires, valeur)
+        retenue = False
+        if destinations.cadencés and destinataires:
+            retenue = True
+            destinataires = self._cadencer(destinations.cadencés,
+                                           destinataires, nom, valeur, False)
+        nombre = len(destinataires) + len(destinations.distants)
+        if not nombre:
+            # Personne à qui remettre la donnée : inutile de la coder. Une
+            # donnée retenue ou écartée par une cadence est toutefois
+            # enregistrée, à l'heure de son émission
+            if retenue and self._journal is not None:
+                self._journal.enregistrer(self._horloge.heure(), nom,
+                                          nom_échange, None, valeur, None)
+            return
+
+        codec = self.codec(nom_échange)
+        if self._différentiels and nom_échange in self._différentiels:
+            # Seules les instances recevant toutes les valeurs du producteur
+            # peuvent reconstruire une différence : les autres, comme les
+            # autres systèmes, reçoivent la valeur entière
+            entiers = [c for c in destinataires if c in destinations.partiels]
+            destinataires = [c for c in destinataires
+                             if c not in destinations.partiels]
+            valeur_entière = self._coder(
+                nom, nom_échange, codec, valeur,
+                len(entiers) + len(destinations.distants))
+            valeur_codée = self._coder(
+                nom, nom_échange, codec,
+                self._différencier(nom, nom_échange, valeur),
+                len(destinataires)) if destinataires else None
+        else:
+            entiers = ()
+            valeur_entière = valeur_codée = self._coder(
+                nom, nom_échange, codec, valeur, nombre)
+        if self._journal is not None:
+            # Le journal conserve toujours la valeur entière
+            self._journal.enregistrer(
+                self._horloge.heure(), nom, nom_échange,
+                None if valeur_entière is None else codec, valeur,
+                valeur_entière)
+
+        for lien in destinations.distants:
+            lien.put((nom_échange, valeur_entière))
+        self._remettre(nom, nom_échange, valeur_codée, destinataires, lots)
+        if entiers:
+            self._remettre(nom, nom_échange, valeur_entière, entiers, lots)
+
+    def _coder(self, nom, nom_échange, codec, valeur, nombre, remises=None):
+        """Codage d'une valeur pour `nombre` destinataires, s'il y en a
+
+        remises → nombre de remises mesurées, à défaut `nombre`
+        """
+        if not nombre:
+            return None
+        mesures = self._mesures
+        if not mesures.active:
+            return codec.encoder_pour(valeur, nombre)
+        début = time.perf_counter_ns()
+        valeur_codée = codec.encoder_pour(valeur, nombre)
+        mesures.codage(nom, nom_échange, time.perf_counter_ns() - début,
+                       nombre if remises is None else remises)
+        return valeur_codée
+
+    def _différencier(self, nom, nom_échange, valeur):
+        """Différence à transmettre pour un échange différentiel (voir
+        coton.différentiel)
+        """
+        émetteur = self._émetteurs.get((nom, nom_échange))
+        if émetteur is None:
+            émetteur = self._émetteurs[(nom, nom_échange)] = Émetteur(
+                self._différentiels[nom_échange])
+        return émetteur.différence(nom, valeur)
+
+    def resynchroniser(self, nom, nom_échange):
+        """Demande d'une image complète au producteur d'un échange
+        différentiel
+        """
+        émetteur = self._émetteurs.get((nom, nom_échange))
+        if émetteur is not None:
+            émetteur.image_demandée = True
+
+    def recevoir(self, nom, nom_échange, valeur_codée):
+        """Remise aux acteurs d'une donnée déjà codée, venue d'un autre
+        système par le lien nommé
+        """
+        destinations = self._plan.get((nom, nom_échange))
+        if destinations is None:
+            destinations = self._planifier(nom, nom_échange)
+        valeur = None
+        if destinations.réparties or destinations.filtrés:
+            # La répartition et les filtres peuvent dépendre de la donnée
+            # elle-même
+            valeur = self.codec(nom_échange).décoder(valeur_codée)
+        destinataires = self._destinataires(destinations, nom_échange, valeur)
+        if destinations.filtrés:
+            destinataires = self._filtrer(destinations.filtrés,
+                                          destinataires, valeur)
+        if destinations.cadencés:
+            destinataires = self._cadencer(destinations.cadencés,
+                                           destinataires, nom, valeur_codée,
+                                           True)
+        self._remettre(nom, nom_échange, valeur_codée, destinataires)
+
+    def _destinataires(self, destinations, nom_échange, valeur):
+        """Instances destinataires d'une donnée
+        """
+        if not destinations.réparties:
+            return destinations.fixes
+        destinataires = list(destinations.fixes)
+        for nom_type, répliques, répartition in destinations.réparties:
+            destinataires.append(self._répartir(
+                nom_type, répliques, répartition, nom_échange, valeur))
+        return destinataires
+
+    def _filtrer(self, filtrés, destinataires, valeur):
+        """Destinataires dont le filtre accepte la donnée
+        """
+        return [c for c in destinataires
+                if c not in filtrés or filtrés[c](valeur)]
+
+    def _cadencer(self, cadencés, destinataires, nom, valeur, codée):
+        """Destinataires dont la cadence admet la donnée, qui est sinon
+        retenue
+        """
+        return [c for c in destinataires
+                if c not in cadencés
+                or cadencés[c].admettre(self, nom, valeur, codée)]
+
+    def _relâcher(self, nom, nom_échange, valeur_codée, destinataire):
+        """Remise d'une donnée émise par `nom` et retenue par une cadence,
+        déjà codée et enregistrée au journal
+        """
+        if self._mesures.active:
+            self._mesures.relâchement(nom, nom_échange)
+        if self._traceur.niveau >= trace.DÉTAIL:
+            self._traceur.tracer(trace.DÉTAIL, "{}: {} → {}", nom_échange,
+                                 nom, destinataire)
+        # Déposée par le minuteur, qu'une boîte pleine ne doit pas arrêter
+        self._files[destinataire].put_hors_limite((nom_échange,
+                                                    valeur_codée))
+
+    def _remettre(self, nom, nom_échange, valeur_codée, destinataires,
+                  lots=None):
+        tracé = self._traceur.niveau >= trace.DÉTAIL
+        for c in destinataires:
+            if tracé:
+                self._traceur.tracer(trace.DÉTAIL, "{}: {} → {}",
+                                     nom_échange, nom, c)
+            if lots is None:
+                self._files[c].put((nom_échange, valeur_codée))
+            else:
+                lots.setdefault(c, []).append((nom_échange, valeur_codée))
 
     def instance(self, nom):
         return self._instances[nom]
 
-    def run(self):
+    def entrée(self, nom):
+        """Point d'entrée inconditionnel d'une instance, s'il existe
+        """
+        return self._entrées.get(self._type_de[nom])
+
+    def codec(self, nom_échange):
+        """Codec employé pour l'échange donné
+        """
+        return self._codecs.get(nom_échange, self._codec)
+
+    def définir_codec(self, codec, nom_échange=None):
+        """Choix du codec d'un échange, ou du système en l'absence de nom
+        """
+        if nom_échange is None:
+            self._codec = codec
+        else:
+            self._codecs[nom_échange] = codec
+
+    def limiter(self, nom_type, capacité, politique=BLOQUER,
+                nom_échange=None):
+        """Limitation des boîtes d'entrée d'un type d'acteur, ou des seuls
+        messages d'un de ses échanges (voir BoîteBornée)
+        """
+        self._limites[nom_type].append((capacité, politique, nom_échange))
+        for nom in self._répliques[nom_type]:
+            boîte = self._files[nom]
+            if not isinstance(boîte, BoîteBornée):
+                bornée = BoîteBornée()
+                priorités = self._priorités_de(nom_type)
+                if priorités:
+                    bornée.prioriser(priorités)
+                try:
+                    while True:
+                        bornée.put(boîte.get_nowait())
+                except queue.Empty:
+                    pass
+                self._files[nom] = boîte = bornée
+            boîte.limiter(capacité, politique, nom_échange)
+
+    def mesures(self):
+        """Instantané des mesures de fonctionnement (voir coton.mesures)
+        """
+        return self._mesures.instantané(self)
+
+    def mesurer(self, active=True, période=None, flux=None):
+        """Activation des mesures, et de leur écriture périodique
+        """
+        self._mesures.active = active
+        self._mesures.publier(self, période if active else None, flux)
+
+    def définir_horloge(self, horloge):
+        """Choix de l'horloge du système (voir coton.temps)
+        """
+        self._horloge = horloge
+        self._minuteur.arrêter()
+        self._minuteur = Minuteur(horloge)
+
+    def enregistrer(self, chemin):
+        """Enregistrement des données transmises dans un journal (voir
+        coton.journal), ou arrêt de l'enregistrement si chemin est None
+        """
+        if self._journal is not None:
+            self._journal.fermer()
+        self._journal = None if chemin is None else Enregistreur(chemin)
+
+    def tracer(self, niveau, puits=None):
+        """Choix du niveau de trace (voir coton.trace), et de sa destination
+        """
+        self._traceur.configurer(niveau, puits)
+
+    def routage(self, nom):
+        """Table de correspondance nom système → descripteur d'un acteur
+        """
+        return self._routages[self._type_de.get(nom, nom)]
+
+    def vider_sortie(self, nom):
+        """Transmission des données différées produites par une activation
+        """
+        sortie = self._sorties[nom]
+        if not sortie:
+            return
+
+        # Les données sont regroupées par destinataire, afin que chacun
+        # reçoive en une seule fois toute la production de l'activation
+        lots = dict()
+        for donnée in sortie:
+            if not donnée.immediate:
+                self.transmettre(nom, donnée.name, donnée.value, lots)
+        sortie.clear()
+        for c, messages in lots.items():
+            if len(messages) == 1:
+                self._files[c].put(messages[0])
+            else:
+                self._files[c].put_lot(messages)
+
+    def run(self, ordonnanceur=None):
+        """Exécution du système, jusqu'à son arrêt
+        """
+        self.démarrer(ordonnanceur)
+        self.attendre()
+
+    def démarrer(self, ordonnanceur=None):
+        """Exécution du système, sans attendre son arrêt
+
+        ordonnanceur → "tâches" (par défaut), "réserve", "asyncio",
+                       "processus", ou instance d'une classe présentant les
+                       méthodes démarrer, arrêter et joindre
+        """
+        if ordonnanceur is None or isinstance(ordonnanceur, str):
+            ordonnanceur = créer_ordonnanceur(ordonnanceur or "tâches")
+        self._ordonnanceur = ordonnanceur
+        self._fin.clear()
+
+        for orphelin in self.compiler():
+            print("AVERTISSEMENT : {}".format(orphelin))
+
         # Création des instances
-        for nom, typ in self._types.items():
-            self._instances[nom] = typ()
+        for nom, nom_type in self._type_de.items():
+            self._instances[nom] = self._instancier(nom, nom_type)
 
         # Création des tâches
-        for nom in self._types:
-            if nom in self._entrées:
-                t = threading.Thread(target=tâche_autonome, name=nom, args=(
-                    nom, self._files[nom], self._entrées[nom]))
-            else:
-                t = threading.Thread(target=tâche, name=nom,
-                                     args=(nom, self._files[nom]))
-            self._tâches[nom] = t
-            t.start()
+        self._horloge.installer(self)
+        ordonnanceur.démarrer(self)
+
+        # Activations périodiques et différées, déposées dans les boîtes
+        # d'entrée éventuellement remplacées par l'ordonnanceur
+        for nom, nom_type in self._type_de.items():
+            for att in self._routages[nom_type].values():
+                if isinstance(att, _Minuterie):
+                    self._minuteur.programmer(
+                        functools.partial(self._files[nom].put_hors_limite,
+                                          (att.system_name, None)),
+                        att.every if att.after is None else att.after,
+                        att.every)
+        self._minuteur.démarrer()
+
+    def _instancier(self, nom, nom_type):
+        """Création d'une instance, nommée avant même son initialisation
+        """
+        typ = self._types[nom_type]
+        instance = typ.__new__(typ)
+        instance._coton_nom = nom
+        instance.__init__()
+        return instance
 
-        # Démarrage des tâches (envoi d'un message anodin)
-        for q in self._files.values():
-            q.put(None)
+    def attendre(self, délai=None):
+        """Attente de l'arrêt du système (par tranches de 1 seconde)
 
-        # … attente infinie (par tranches de 1 seconde)
-        while True:
-            time.sleep(1.0)
+        Retourne vrai si le système est effectivement arrêté.
+        """
+        échéance = None if délai is None else time.monotonic() + délai
+        while not self._fin.is_set():
+            reste = 1.0
+            if échéance is not None:
+                reste = min(reste, échéance - time.monotonic())
+                if reste <= 0.0:
+                    return False
+            self._fin.wait(reste)
+        self._ordonnanceur.joindre()
+        self._minuteur.joindre()
+        self.purger()
+        if self._journal is not None:
+            self._journal.vider()
+        return True
+
+    def purger(self):
+        """Abandon des messages restés en attente dans les boîtes d'entrée,
+        ou retenus par une cadence
+        """
+        for cadence in list(self._cadences.values()):
+            cadence.abandonner()
+        for boîte in list(self._files.values()):
+            try:
+                while True:
+                    message = boîte.get_nowait()
+                    if message[0] is not None and message is not _ARRÊT:
+                        _abandonner(message)
+            except (queue.Empty, AttributeError):
+                pass
+
+    def arrêter(self):
+        """Demande d'arrêt du système, y compris depuis un acteur
+        """
+        if self._ordonnanceur is not None and not self._fin.is_set():
+            self._fin.set()
+            self._minuteur.arrêter()
+            self._horloge.arrêter()
+            self._ordonnanceur.arrêter()
 
 
 GM = GrandMamamouchi()
@@ -98,12 +841,40 @@ class recv_msg:
     """
 
     def __init__(self, doc="", default=None, *,
-                 system_name=None):
+                 system_name=None, codec=None, capacity=None,
+                 policy=BLOQUER, routing=DIFFUSION, priority=None,
+                 rate=None, every=None, filter=None):
+        """
+        capacity → nombre maximal de valeurs en attente de traitement
+        policy → comportement une fois ce nombre atteint : BLOQUER le
+                 producteur, ÉCARTER la plus ancienne valeur, ou FUSIONNER
+                 avec la plus récente (voir BoîteBornée)
+        routing → répartition des valeurs entre les instances du type
+                  consommateur : DIFFUSION à toutes, TOURNIQUET, ou
+                  Partition selon une clé
+        priority → priorité de traitement des valeurs reçues, la plus élevée
+                   d'abord (0 par défaut), à défaut celle du producteur
+        rate → nombre maximal de valeurs reçues par seconde, les valeurs
+               intermédiaires étant écartées par le producteur
+        every → réception d'une valeur sur `every` seulement
+        filter → réception des seules valeurs acceptées par une fonction, ou
+                 dont les champs (attributs ou clés) ont les valeurs données
+                 par un dictionnaire ; les autres sont écartées par le
+                 producteur
+        """
         self.__doc__ = doc
         self._name = "ça_marche_pas 1"
         self._system_name = system_name
         self._default = default
         self._actions = list()
+        self._codec = codec
+        self._capacity = capacity
+        self._policy = policy
+        self._routing = routing
+        self._priority = priority
+        self._rate = rate
+        self._every = every
+        self._filter = _prédicat(filter)
 
     def __get__(self, obj, objtype):
         """Preferred way to read attribute (for framework user)
@@ -139,19 +910,67 @@ class recv_msg:
         Callbacks associated with the attribute are also executed, and their
         outputs transmitted
         """
-        # Mise-à-jour de la valeur
+        # Mise-à-jour de la valeur, éventuellement transmise sous forme de
+        # différence
+        if type(value) is Différence:
+            value = reconstruire(obj, self._system_name, value)
+            if value is DÉSYNCHRONISÉ:
+                return
         setattr(obj, self._name, value)
 
-        # Appel des points d'entrée
-        nom = type(obj).__name__
-        sortie = GM._sorties[nom]
+        # Appel des points d'entrée, et production des sorties associées
+        nom = obj._coton_nom
+        début = time.perf_counter_ns()
+        if obj._coton_groupé:
+            for action in self._actions:
+                action(obj)
+            GM.vider_sortie(nom)
+        else:
+            for action in self._actions:
+                action(obj)
+                GM.vider_sortie(nom)
+        if GM._mesures.active:
+            GM._mesures.activation(nom, self._system_name,
+                                   time.perf_counter_ns() - début)
+
+
+# Préfixe des noms système des pseudo-échanges de minuterie
+_MINUTERIE = "minuterie "
+
+
+class _Minuterie:
+    """Pseudo-échange d'un point d'entrée périodique ou différé (voir entry)
+
+    Le minuteur du système dépose un message dans la boîte d'entrée de
+    chaque instance, à chaque échéance.
+    """
+
+    def __init__(self, nom, every, after):
+        self._name = "_coton_échéance_" + nom
+        self._system_name = _MINUTERIE + nom
+        self._actions = list()
+        self.every = every
+        self.after = after
+
+    @property
+    def system_name(self):
+        return self._system_name
+
+    def add_callback(self, callback):
+        self._actions.append(callback)
+
+    def update(self, obj, value):
+        """Appel du point d'entrée, et production des sorties associées
+        """
+        setattr(obj, self._name, value)
+        nom = obj._coton_nom
+        début = time.perf_counter_ns()
         for action in self._actions:
             action(obj)
-            # Production des sorties associées
-            for donnée in sortie:
-                if not donnée.immediate:
-                    GM.transmettre(nom, donnée.name, donnée.value)
-            sortie.clear()
+        GM.vider_sortie(nom)
+        if GM._mesures.active:
+            GM._mesures.activation(nom, self._system_name,
+                                   time.perf_counter_ns() - début)
 
 
 class send_msg:
@@ -159,10 +978,20 @@ class send_msg:
     """
 
     def __init__(self, doc="", default=None, *,
-                 system_name=None, immediate=False):
+                 system_name=None, immediate=False, codec=None,
+                 priority=None, delta=None, immutable=False):
         """
         immediate → chaque mise-à-jour provoque l'émission immédiate de la
                      donnée
+        codec → codage de la donnée lors de sa transmission (voir
+                coton.codage), à défaut celui du système
+        priority → priorité de traitement de la donnée par ses
+                   consommateurs, la plus élevée d'abord (0 par défaut)
+        delta → transmission des seules différences entre valeurs
+                successives (voir coton.différentiel) : vrai, ou nombre
+                d'émissions entre deux images complètes
+        immutable → valeurs immuables (voir coton.immuable), vérifiées à
+                    chaque émission et remises par référence, sans recopie
         """
         self.__doc__ = doc
         self._name = "ça_marche_pas 2"
@@ -170,6 +999,12 @@ class send_msg:
         self._default = default
         self._actions = list()
         self._immediate = immediate
+        self._codec = codec
+        if immutable and codec is None:
+            self._codec = _CODEC_IMMUABLE
+        self._priority = priority
+        self._delta = delta
+        self._immutable = immutable
 
     def __get__(self, obj, objtype):
         """Preferred way to read attribute (for framework user)
@@ -180,8 +1015,10 @@ class send_msg:
             return getattr(obj, self._name)
 
     def __set__(self, obj, value):
+        if self._immutable:
+            self.vérifier(value)
         retour = setattr(obj, self._name, value)
-        GM.publier(type(obj).__name__, self._system_name,
+        GM.publier(obj._coton_nom, self._system_name,
                    value, self._immediate)
         return retour
 
@@ -198,6 +1035,13 @@ class send_msg:
         """
         return self._system_name
 
+    def vérifier(self, value):
+        """Refus d'une valeur muable pour un échange déclaré immuable
+        """
+        if not immuable(value):
+            raise TypeError("Valeur muable pour l'échange immuable {!r} :"
+                            " {!r}".format(self._system_name, value))
+
     @property
     def is_immediate(self):
         """If true, update of the attribute value is immediately communicated
@@ -215,19 +1059,28 @@ class send_msg:
         Callbacks associated with the attribute are also executed, and their
         outputs transmitted
         """
-        # Mise-à-jour de la valeur
+        # Mise-à-jour de la valeur, éventuellement transmise sous forme de
+        # différence
+        if type(value) is Différence:
+            value = reconstruire(obj, self._system_name, value)
+            if value is DÉSYNCHRONISÉ:
+                return
         setattr(obj, self._name, value)
 
-        # Appel des points d'entrée
-        nom = type(obj).__name__
-        sortie = GM._sorties[nom]
-        for action in self._actions:
-            action(obj)
-            # Production des sorties associées
-            for donnée in sortie:
-                if not donnée.immediate:
-                    GM.transmettre(nom, donnée.name, donnée.value)
-            sortie.clear()
+        # Appel des points d'entrée, et production des sorties associées
+        nom = obj._coton_nom
+        début = time.perf_counter_ns()
+        if obj._coton_groupé:
+            for action in self._actions:
+                action(obj)
+            GM.vider_sortie(nom)
+        else:
+            for action in self._actions:
+                action(obj)
+                GM.vider_sortie(nom)
+        if GM._mesures.active:
+            GM._mesures.activation(nom, self._system_name,
+                                   time.perf_counter_ns() - début)
 
 
 class entry:
@@ -251,13 +1104,24 @@ class entry:
 
     provoque l'appelle de `toto` à chaque mise-à-jour de `tata`.
 
+    Un point d'entrée peut aussi être activé périodiquement, ou une seule
+    fois après un délai, en secondes selon l'horloge du système :
+
+      @entry(every=0.01)
+      def toto(self):
+         …
+
+    appelle `toto` toutes les 10 ms, et `@entry(after=2.0)` une seule fois,
+    2 s après le démarrage. Les deux peuvent être combinés, entre eux comme
+    avec des données reçues.
+
     Évidemment, un Acteur ne peut pas avoir qu'au plus un point d'entrée
     inconditionnel, et seulement si c'est le seul.
 
     Les send_msg doivent d'ailleurs être marqués `instantané` == True.
     """
 
-    def __init__(self, *données):
+    def __init__(self, *données, every=None, after=None):
         # On doit pouvoir faire mieux. Peut-être même faudrait-il distinguer
         # les points d'entrée inconditionnels avec un marqueur spécifique ?
         if len(données) == 1 and not isinstance(données[0], (recv_msg, send_msg)):
@@ -266,6 +1130,8 @@ class entry:
         else:
             self.méthode = None
             self.données = données
+        self.every = every
+        self.after = after
 
     def __call__(self, méthode):
         # Il est inutile de copier les attributs classiques pour faire un
@@ -300,9 +1166,14 @@ def décorateur_init(i, champs):
 
 class MétaActeur(type):
     """Lien entre le code utilisateur et le GrandMamamouchi
+
+    grouped → activation groupée : les points d'entrée déclenchés par une
+              donnée reçue, ou par toutes celles en attente, sont chacun
+              appelés une seule fois, puis leurs sorties transmises une
+              seule fois
     """
 
-    def __new__(metacls, nom, bases, attribs):
+    def __new__(metacls, nom, bases, attribs, grouped=False):
         champs = dict()
 
         # Suppression des décorateurs 'entry', tout en conservant les
@@ -310,10 +1181,12 @@ class MétaActeur(type):
         # est un générateur.
         a_entry = False
         est_générateur = False
+        minuteries = dict()
         for k in attribs:
             v = attribs[k]
             if isinstance(v, entry):
-                if len(v.données) == 0:
+                if len(v.données) == 0 and v.every is None \
+                        and v.after is None:
                     if a_entry:
                         print(
                             "ERREUR : l'Acteur {!r} a plus d'un point d'entrée"
@@ -333,8 +1206,13 @@ class MétaActeur(type):
                 for msg in attribs.values():
                     if msg in v.données:
                         msg.add_callback(v.méthode)
+                if v.every is not None or v.after is not None:
+                    minuterie = _Minuterie(k, v.every, v.after)
+                    minuterie.add_callback(v.méthode)
+                    minuteries["_coton_minuterie_" + k] = minuterie
 
                 a_entry = True
+        attribs.update(minuteries)
         if not a_entry:
             print("AVERTISSEMENT : l'Acteur {!r} n'a aucun point"
                   "d'entrée".format(nom))
@@ -355,6 +1233,11 @@ class MétaActeur(type):
         i = intérim.__init__
         attribs["__init__"] = décorateur_init(i, champs)
 
+        # Nom de l'instance auprès du Grand Mamamouchi, remplacé par celui de
+        # chaque réplique lors du démarrage du système
+        attribs["_coton_nom"] = nom
+        attribs["_coton_groupé"] = grouped
+
         # On crée le type final
         retour = super().__new__(metacls, nom, bases, attribs)
 
@@ -363,6 +1246,9 @@ class MétaActeur(type):
 
         return retour
 
+    def __init__(cls, nom, bases, attribs, grouped=False):
+        super().__init__(nom, bases, attribs)
+
 
 DonnéeSystème = collections.namedtuple(
     "DonnéeSystème", ["name", "value", "immediate"])
@@ -370,102 +1256,670 @@ DonnéeSystème = collections.namedtuple(
 
 class FileSortie:
     """File de production d'un point d'entrée
+
+    Les données immédiates sont toutes conservées, dans l'ordre de leur
+    production. Seule la dernière valeur d'une donnée différée est conservée,
+    à la place de sa production la plus récente.
+
+    Les entrées sont indexées par un numéro d'ordre (données immédiates) ou
+    par leur nom (données différées) : empilement, remplacement et vidage se
+    font donc en temps constant par entrée.
     """
 
     def __init__(self):
-        self._file = list()
-        self._indexes = dict()
+        self._file = dict()
+        self._numéro = 0
 
     def clear(self):
         self._file.clear()
-        self._indexes.clear()
+        self._numéro = 0
 
     def push(self, nom, valeur, immédiat):
         entrée = DonnéeSystème(nom, valeur, immédiat)
-        if not immédiat:
-            if nom in self._indexes:
-                del self._file[self._indexes[nom]]
-            self._indexes[nom] = len(self._file)
-        self._file.append(entrée)
+        if immédiat:
+            self._numéro += 1
+            self._file[self._numéro] = entrée
+        else:
+            # Retrait préalable, afin que l'entrée passe en fin de file
+            self._file.pop(nom, None)
+            self._file[nom] = entrée
 
     def __iter__(self):
-        yield from self._file
+        yield from self._file.values()
 
     def __len__(self):
         return len(self._file)
 
     def __getitem__(self, index):
-        return self._file[index]
+        return list(self._file.values())[index]
 
 
-def tâche(nom_instance, queue):
-    instance = GM.instance(nom_instance)
+class Boîte:
+    """File d'entrée d'un acteur
 
-    # Attente du point de synchronisation du démarrage
-    queue.get()
+    Elle s'utilise comme une `queue.Queue`, mais peut aussi signaler à un
+    ordonnanceur qu'elle a des messages à traiter (voir `planifier`).
+    """
 
-    # Boucle active
-    while True:
-        nom_système, valeur_codée = queue.get()
+    def __init__(self):
+        self._file = collections.deque()
+        self._verrou = threading.Lock()
+        self._condition = threading.Condition(self._verrou)
+        self._rappel = None
+        self._planifiée = False
+        self._horloge = None
+
+    def put(self, message):
+        self._mettre(message, self._déposer)
+
+    def put_hors_limite(self, message):
+        """Dépôt d'un message échappant aux limites de la boîte, par une
+        tâche qui ne doit jamais attendre (minuteur)
+        """
+        self._mettre(message, self._ajouter)
 
-        # Conversion du nom système en nom local
-        for nom_attr, attr in type(instance).__dict__.items():
-            if (isinstance(attr, (recv_msg, send_msg)) and
-                    attr._system_name == nom_système):
-                nom = nom_attr
-                break
+    def _mettre(self, message, déposer):
+        with self._condition:
+            if self._horloge is None:
+                déposer(message)
+            else:
+                # Le message est compté avant d'être visible, afin que
+                # l'horloge ne puisse jamais croire le système inactif
+                self._horloge.occuper()
+                avant = self._nb_messages()
+                déposer(message)
+                retrait = 1 - (self._nb_messages() - avant)
+                if retrait:
+                    self._horloge.occuper(-retrait)
+            self._condition.notify()
+            réveil = self._rappel is not None and not self._planifiée
+            if réveil:
+                self._planifiée = True
+        if réveil:
+            self._rappel(self)
+
+    def put_lot(self, messages):
+        """Dépôt de plusieurs messages, pour un seul réveil du destinataire
+        """
+        with self._condition:
+            if self._horloge is None:
+                for message in messages:
+                    self._déposer(message)
+            else:
+                self._horloge.occuper(len(messages))
+                avant = self._nb_messages()
+                for message in messages:
+                    self._déposer(message)
+                retrait = len(messages) - (self._nb_messages() - avant)
+                if retrait:
+                    self._horloge.occuper(-retrait)
+            self._condition.notify()
+            réveil = self._rappel is not None and not self._planifiée
+            if réveil:
+                self._planifiée = True
+        if réveil:
+            self._rappel(self)
+
+    def get(self):
+        with self._condition:
+            while not self._nb_messages():
+                self._condition.wait()
+            return self._retirer()
+
+    def get_lot(self):
+        """Retrait de tous les messages en attente, le premier étant attendu
+        au besoin
+
+        Le retrait s'interrompt au message d'arrêt, qui clôt alors le lot.
+        """
+        with self._condition:
+            while not self._nb_messages():
+                self._condition.wait()
+            lot = list()
+            while self._nb_messages():
+                message = self._retirer()
+                lot.append(message)
+                if message is _ARRÊT:
+                    break
+            return lot
+
+    def get_nowait(self):
+        with self._condition:
+            if not self._nb_messages():
+                raise queue.Empty
+            return self._retirer()
+
+    def qsize(self):
+        return self._nb_messages()
+
+    def traité(self):
+        """Fin du traitement d'un message retiré de la boîte
+        """
+        if self._horloge is not None:
+            self._horloge.libérer()
+
+    def prioriser(self, priorités, patience=8):
+        """Service prioritaire des messages de certains échanges
+
+        priorités → priorité par nom d'échange, 0 par défaut ; les messages
+                    de plus haute priorité sont traités les premiers
+        patience → nombre de fois qu'une voie de moindre priorité peut être
+                   laissée de côté avant d'être servie malgré tout
+        """
+        with self._condition:
+            voies = _Voies(priorités, self._nom_échange, patience)
+            for élément in self._file:
+                voies.append(élément)
+            self._file = voies
+
+    @staticmethod
+    def _nom_échange(élément):
+        return élément[0]
+
+    def _déposer(self, message):
+        self._file.append(message)
+
+    _ajouter = _déposer
+
+    def _retirer(self):
+        return self._file.popleft()
+
+    def _nb_messages(self):
+        return len(self._file)
+
+    def planifier(self, rappel):
+        """Demande d'appel de `rappel(boîte)` dès que la boîte a des messages
+        à traiter
+
+        La boîte n'est plus signalée ensuite qu'une fois libérée par
+        l'ordonnanceur, ce qui garantit qu'un acteur n'est jamais traité par
+        deux tâches à la fois.
+        """
+        with self._condition:
+            self._rappel = rappel
+            réveil = self._nb_messages() > 0
+            self._planifiée = réveil
+        if réveil:
+            rappel(self)
+
+    def libérer(self):
+        """Fin du traitement de la boîte par l'ordonnanceur
+        """
+        with self._condition:
+            réveil = self._nb_messages() > 0
+            self._planifiée = réveil
+        if réveil:
+            self._rappel(self)
+
+
+class _Voies:
+    """Contenu d'une boîte, réparti en voies de priorités distinctes
+
+    S'utilise comme une deque, mais `popleft` sert d'abord la voie la plus
+    prioritaire : une voie non vide laissée de côté plus de `patience` fois
+    est toutefois servie à son tour, afin que nulle ne soit affamée.
+    L'itération va de la voie la moins prioritaire à la plus prioritaire.
+    """
+
+    def __init__(self, priorités, nom_échange, patience):
+        self._priorités = dict(priorités)
+        self._nom_échange = nom_échange
+        self._patience = patience
+        self._voies = dict()
+        self._ordre = list()
+        self._attentes = dict()
+        self._taille = 0
+
+    def append(self, élément):
+        priorité = self._priorités.get(self._nom_échange(élément), 0)
+        voie = self._voies.get(priorité)
+        if voie is None:
+            voie = self._voies[priorité] = collections.deque()
+            self._attentes[priorité] = 0
+            self._ordre = sorted(self._voies, reverse=True)
+        voie.append(élément)
+        self._taille += 1
+
+    def popleft(self):
+        choisie = None
+        for priorité in self._ordre:
+            if not self._voies[priorité]:
+                continue
+            if choisie is None:
+                choisie = priorité
+            else:
+                self._attentes[priorité] += 1
+                if self._attentes[priorité] > self._patience \
+                        and self._attentes[choisie] <= self._patience:
+                    choisie = priorité
+        if choisie is None:
+            raise IndexError("pop from an empty deque")
+        self._attentes[choisie] = 0
+        self._taille -= 1
+        return self._voies[choisie].popleft()
+
+    def __len__(self):
+        return self._taille
+
+    def __iter__(self):
+        for priorité in reversed(self._ordre):
+            yield from self._voies[priorité]
+
+
+# Contenu d'une cellule de BoîteBornée dont le message a été écarté
+_ÉCARTÉ = object()
+
+
+class BoîteBornée(Boîte):
+    """File d'entrée d'un acteur, de taille limitée
+
+    La limite porte sur l'ensemble des messages de la boîte, et/ou sur les
+    messages d'un échange donné. Une fois la limite atteinte, la politique
+    choisie s'applique :
+
+    - BLOQUER : le producteur attend qu'une place se libère ;
+    - ÉCARTER : le plus ancien message en attente est oublié ;
+    - FUSIONNER : le plus récent message en attente du même échange prend la
+      nouvelle valeur, sans changer de place (la dernière valeur l'emporte).
+      À défaut d'un tel message, le plus ancien est oublié.
+
+    Les messages de service (démarrage, arrêt…), comme ceux déposés par le
+    minuteur du système (voir `put_hors_limite`), ne sont jamais limités.
+    Une échéance d'un point d'entrée périodique n'y est toutefois déposée
+    qu'à défaut d'une autre déjà en attente.
+
+    Avec BLOQUER, deux acteurs s'alimentant mutuellement peuvent
+    s'interbloquer si leurs deux boîtes sont pleines.
+    """
+
+    def __init__(self, capacité=None, politique=BLOQUER):
+        super().__init__()
+        self._capacité = capacité
+        self._politique = politique
+        self._limites = dict()
+        self._en_attente = dict()
+        self._taille = 0
+        self._place = threading.Condition(self._verrou)
+
+    def limiter(self, capacité, politique=BLOQUER, nom_échange=None):
+        """Limitation de la boîte entière, ou des messages d'un échange
+        """
+        with self._condition:
+            if nom_échange is None:
+                self._capacité = capacité
+                self._politique = politique
+            else:
+                self._limites[nom_échange] = (capacité, politique)
+
+    @staticmethod
+    def _nom_échange(élément):
+        message = élément[0]
+        return None if message is _ÉCARTÉ else message[0]
+
+    def put_lot(self, messages):
+        # Un producteur bloqué en cours de lot doit laisser le destinataire
+        # traiter les premiers messages : ils sont alors remis un par un
+        if self._politique == BLOQUER and self._capacité is not None \
+                or any(p == BLOQUER for _, p in self._limites.values()):
+            for message in messages:
+                self.put(message)
         else:
-            print("Erreur : pas de tel échange ({}.{})".format(
-                nom_instance, nom_système))
-            nom = nom_système
+            super().put_lot(messages)
+
+    def _déposer(self, message):
+        nom = message[0]
+        if nom is None or message is _ARRÊT:
+            self._file.append([message])
+            self._taille += 1
+            return
+
+        en_attente = self._en_attente.setdefault(nom, collections.deque())
+        limite = self._limites.get(nom)
+        if limite is not None:
+            capacité, politique = limite
+            if len(en_attente) >= capacité:
+                if self._contraindre(politique, en_attente, message,
+                                     lambda: len(en_attente) >= capacité):
+                    return
+        if self._capacité is not None and self._taille >= self._capacité:
+            if self._contraindre(self._politique, None, message,
+                                 lambda: self._taille >= self._capacité):
+                return
+
+        cellule = [message]
+        self._file.append(cellule)
+        en_attente.append(cellule)
+        self._taille += 1
+
+    def _ajouter(self, message):
+        nom = message[0]
+        cellule = [message]
+        if nom is not None and message is not _ARRÊT:
+            en_attente = self._en_attente.setdefault(nom,
+                                                     collections.deque())
+            if en_attente and nom.startswith(_MINUTERIE):
+                # Une échéance déjà en attente suffit
+                return
+            en_attente.append(cellule)
+        self._file.append(cellule)
+        self._taille += 1
+
+    def _contraindre(self, politique, en_attente, message, plein):
+        """Application d'une politique de limitation
+
+        Retourne vrai si le message a été fusionné avec un message en attente.
+        """
+        if politique == FUSIONNER:
+            dernières = self._en_attente[message[0]]
+            if dernières:
+                _abandonner(dernières[-1][0])
+                dernières[-1][0] = message
+                return True
+        elif politique == BLOQUER:
+            while plein():
+                self._place.wait()
+            return False
+
+        # Oubli du plus ancien message, de l'échange ou de toute la boîte
+        if en_attente is None:
+            for cellule in self._file:
+                if cellule[0] is not _ÉCARTÉ and cellule[0][0] is not None:
+                    en_attente = self._en_attente[cellule[0][0]]
+                    break
+            else:
+                return False
+        cellule = en_attente.popleft()
+        _abandonner(cellule[0])
+        cellule[0] = _ÉCARTÉ
+        self._taille -= 1
+        return False
+
+    def _retirer(self):
+        while True:
+            message = self._file.popleft()[0]
+            if message is not _ÉCARTÉ:
+                break
+        if message[0] is not None and message is not _ARRÊT:
+            self._en_attente[message[0]].popleft()
+        self._taille -= 1
+        self._place.notify_all()
+        return message
 
-        # Stockage de la donnée, et appel des points d'activations liés
-        valeur = pickle.loads(valeur_codée)
-        attr.update(instance, valeur)
+    def _nb_messages(self):
+        return self._taille
+
+
+def _abandonner(message):
+    """Renoncement au traitement d'un message de donnée
+    """
+    GM.codec(message[0]).abandonner(message[1])
+
+
+# Message de fin d'activité d'une tâche
+_ARRÊT = ("arrêt", None)
+
+
+class OrdonnanceurTâches:
+    """Une tâche (thread) dédiée par acteur
+
+    noms → acteurs à prendre en charge, par défaut tous
+    """
+
+    def __init__(self, noms=None):
+        self._noms = noms
+        self._tâches = dict()
+        self._files = dict()
+
+    def démarrer(self, gm):
+        noms = list(gm._files) if self._noms is None else self._noms
+        self._files = {nom: gm._files[nom] for nom in noms}
+        for nom in noms:
+            entrée = gm.entrée(nom)
+            if entrée is not None:
+                t = threading.Thread(target=tâche_autonome, name=nom, args=(
+                    nom, self._files[nom], entrée), daemon=True)
+            else:
+                t = threading.Thread(target=tâche, name=nom,
+                                     args=(nom, self._files[nom]),
+                                     daemon=True)
+            self._tâches[nom] = t
+            t.start()
+
+    def arrêter(self):
+        for q in self._files.values():
+            q.put(_ARRÊT)
+
+    def joindre(self, délai=None):
+        for t in self._tâches.values():
+            if t is not threading.current_thread():
+                t.join(délai)
+
+
+def créer_ordonnanceur(nom):
+    """Ordonnanceur désigné par son nom
+    """
+    if nom == "tâches":
+        return OrdonnanceurTâches()
+    elif nom == "asyncio":
+        from .asynchrone import OrdonnanceurAsyncio
+        return OrdonnanceurAsyncio()
+    elif nom == "réserve":
+        from .réserve import OrdonnanceurRéserve
+        return OrdonnanceurRéserve()
+    elif nom == "processus":
+        from .processus import OrdonnanceurProcessus
+        return OrdonnanceurProcessus()
+    raise ValueError("Ordonnanceur inconnu : {!r}".format(nom))
+
+
+def tâche(nom_instance, queue):
+    instance = GM.instance(nom_instance)
+    routage = GM.routage(nom_instance)
+    codecs = {n: GM.codec(n) for n in routage}
+
+    # Boucle active, traitant d'un coup tous les messages en attente
+    while True:
+        lot = queue.get_lot()
+        arrêt = lot[-1] is _ARRÊT
+        if arrêt:
+            lot.pop()
+
+        if instance._coton_groupé and len(lot) > 1:
+            activer_lot(nom_instance, instance, routage, codecs, lot)
+            for _ in lot:
+                queue.traité()
+        else:
+            for nom_système, valeur_codée in lot:
+                # Stockage de la donnée, et appel des points d'activations
+                # liés. Seuls les échanges de la table de routage sont
+                # acheminés vers l'acteur : la correspondance est donc
+                # toujours connue
+                valeur = codecs[nom_système].décoder(valeur_codée)
+                routage[nom_système].update(instance, valeur)
+                queue.traité()
+
+        if arrêt:
+            return
+
+
+def activer_lot(nom_instance, instance, routage, codecs, messages):
+    """Activation groupée : toutes les données reçues sont stockées, puis
+    chaque point d'entrée concerné est appelé une seule fois, et les sorties
+    transmises une seule fois
+    """
+    actions = dict()
+    reçus = dict()
+    for nom_système, valeur_codée in messages:
+        att = routage[nom_système]
+        valeur = codecs[nom_système].décoder(valeur_codée)
+        if type(valeur) is Différence:
+            valeur = reconstruire(instance, nom_système, valeur)
+            if valeur is DÉSYNCHRONISÉ:
+                continue
+        setattr(instance, att._name, valeur)
+        reçus[nom_système] = None
+        for action in att._actions:
+            actions[action] = None
+
+    début = time.perf_counter_ns()
+    for action in actions:
+        action(instance)
+    GM.vider_sortie(nom_instance)
+    if GM._mesures.active:
+        durée = time.perf_counter_ns() - début
+        for nom_système in reçus:
+            GM._mesures.activation(nom_instance, nom_système, durée)
 
 
 def tâche_autonome(nom_instance, queue, entrée):
     instance = GM.instance(nom_instance)
-    sortie = GM._sorties[nom_instance]
+    routage = GM.routage(nom_instance)
+    codecs = {n: GM.codec(n) for n in routage}
 
-    # Attente du point de synchronisation du démarrage
-    queue.get()
+    coopération = None
+    if inspect.isgeneratorfunction(entrée):
+        coopération = Coopération(GM, nom_instance, instance, entrée, queue)
 
     # Ajout de la première auto-activation
     queue.put((None, None))
 
     # Appel de l'unique point d'activation, en boucle
     while True:
-        nom, valeur_codée = queue.get()
-        if nom is None and valeur_codée is None:
-            # Appel du seul point d'activation
-            entrée(instance)
-
-            # Production des sorties associées
-            for donnée in sortie:
-                if not donnée.immediate:
-                    GM.transmettre(nom_instance, donnée.name, donnée.value)
-            sortie.clear()
-
-            # Empilement dès la sortie de la prochaine auto-activation
-            queue.put((None, None))
-        else:
-            # Stockage de la donnée
-            valeur = pickle.loads(valeur_codée)
-            attr = type(instance).__dict__[nom]
-            attr.update(instance, valeur)
+        for message in queue.get_lot():
+            if message is _ARRÊT:
+                return
+            nom, valeur_codée = message
+            if nom is None and coopération is not None:
+                # Reprise d'un point d'entrée générateur
+                coopération.reprendre()
+            elif nom is None and valeur_codée is None:
+                # Appel du seul point d'activation, et production des
+                # sorties associées
+                début = time.perf_counter_ns()
+                entrée(instance)
+                GM.vider_sortie(nom_instance)
+                if GM._mesures.active:
+                    GM._mesures.activation(nom_instance, entrée.__name__,
+                                           time.perf_counter_ns() - début)
+
+                # Empilement dès la sortie de la prochaine auto-activation
+                queue.put((None, None))
+            else:
+                # Stockage de la donnée
+                valeur = codecs[nom].décoder(valeur_codée)
+                routage[nom].update(instance, valeur)
+                if coopération is not None:
+                    coopération.recevoir(nom)
+            queue.traité()
 
 
-def run():
-    GM.run()
+def _dot(texte):
+    """Identifiant DOT entre guillemets
+    """
+    return '"{}"'.format(texte.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def run(ordonnanceur=None):
+    GM.run(ordonnanceur)
+
+
+def mesures():
+    """Instantané des mesures de fonctionnement : par acteur, profondeur de
+    la boîte d'entrée, données reçues et émises, durées de traitement ; par
+    échange, transmissions, remises et durées de codage
+    """
+    return GM.mesures()
+
+
+def mesurer(active=True, période=None, flux=None):
+    """Activation (par défaut) ou désactivation des mesures, et écriture
+    périodique d'un instantané dans un flux (sortie d'erreur par défaut)
+    """
+    GM.mesurer(active, période, flux)
+
+
+def heure():
+    """Heure du système, en secondes, réelle ou simulée selon l'horloge
+    """
+    return GM._horloge.heure()
+
+
+def dormir(durée):
+    """Attente, en temps réel ou simulé selon l'horloge
+    """
+    GM._horloge.dormir(durée)
+
+
+def définir_horloge(horloge):
+    """Choix de l'horloge du système, par exemple `HorlogeVirtuelle()`
+    """
+    GM.définir_horloge(horloge)
+
+
+def arrêter():
+    """Arrêt du système, par exemple depuis un point d'entrée
+    """
+    GM.arrêter()
+
+
+def répliquer(acteur, nombre):
+    """Choix du nombre d'instances d'un type d'acteur (classe ou nom)
+    """
+    nom = acteur if isinstance(acteur, str) else acteur.__name__
+    GM.répliquer(nom, nombre)
+
+
+def limiter(acteur, capacité, politique=BLOQUER):
+    """Limitation de la boîte d'entrée d'un acteur (classe ou nom)
+    """
+    nom = acteur if isinstance(acteur, str) else acteur.__name__
+    GM.limiter(nom, capacité, politique)
+
+
+def réinitialiser():
+    """Oubli de tous les acteurs déclarés, à des fins de test unitaire
+    """
+    global GM
+    GM.arrêter()
+    GM._minuteur.arrêter()
+    GM.enregistrer(None)
+    GM = GrandMamamouchi()
+
+
+def graphe():
+    """Graphe des échanges du système, au format DOT de Graphviz
+    """
+    return GM.graphe()
+
+
+def enregistrer(chemin):
+    """Enregistrement des données transmises dans un journal, à rejouer par
+    `coton.journal.rejouer`, ou arrêt de l'enregistrement si chemin est None
+    """
+    GM.enregistrer(chemin)
+
+
+def tracer(niveau, puits=None):
+    """Activation des traces de fonctionnement, désactivées par défaut
+    """
+    GM.tracer(niveau, puits)
+
+
+def définir_codec(codec, nom_échange=None):
+    """Choix du codec d'un échange, ou de tout le système
+    """
+    GM.définir_codec(codec, nom_échange)
 
 
 def publier(obj, attr):
     """Si l'utilisateur souhaite déclarer lui-même la publication
     """
-    GM.publier(obj.__class__.__name__,
+    valeur = getattr(obj, attr._name)
+    if isinstance(attr, send_msg) and attr._immutable:
+        attr.vérifier(valeur)
+    GM.publier(obj._coton_nom,
                attr._system_name,
-               getattr(obj, attr._system_name),
+               valeur,
                attr._immediate)
 
 
@@ -473,4 +1927,4 @@ def sortie(obj):
     """Permet d'obtenir la file de sortie d'un objet donné, à des fins de test
     unitaire
     """
-    return GM._sorties[obj.__class__.__name__]
+    return GM._sorties[obj._coton_nom]
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""Exécution de tous les acteurs au sein d'une même boucle asyncio.
+
+Chaque acteur est une coroutine lisant sa propre `asyncio.Queue`. Les points
+d'entrée peuvent indifféremment être des fonctions ou des coroutines
+(`async def`) : ces dernières peuvent alors attendre, par exemple via
+`asyncio.sleep`, sans bloquer les autres acteurs.
+
+Un point d'entrée qui n'est pas une coroutine bloque toute la boucle le temps
+de son exécution : il ne doit donc pas appeler `time.sleep`.
+
+Les boîtes d'entrée n'y sont ni limitées (voir `coton.limiter`), ni
+priorisées (voir `priority`).
+
+Une exception interrompant un acteur est signalée au gestionnaire
+d'exceptions de la boucle, qui la journalise par défaut (logger "asyncio").
+"""
+
+import asyncio
+import functools
+import inspect
+import queue
+import threading
+import time
+
+import coton
+
+
+class BoîteAsyncio:
+    """File d'entrée d'un acteur, alimentable depuis n'importe quelle tâche
+    """
+
+    def __init__(self, boucle):
+        self._boucle = boucle
+        self._file = asyncio.Queue()
+
+    def put(self, message):
+        if _dans_boucle(self._boucle):
+            self._file.put_nowait(message)
+        else:
+            self._boucle.call_soon_threadsafe(self._file.put_nowait, message)
+
+    put_hors_limite = put
+
+    def put_lot(self, messages):
+        if _dans_boucle(self._boucle):
+            self._déposer(messages)
+        else:
+            self._boucle.call_soon_threadsafe(self._déposer, messages)
+
+    def _déposer(self, messages):
+        for message in messages:
+            self._file.put_nowait(message)
+
+    async def get(self):
+        return await self._file.get()
+
+    def qsize(self):
+        return self._file.qsize()
+
+
+def _dans_boucle(boucle):
+    try:
+        return asyncio.get_running_loop() is boucle
+    except RuntimeError:
+        return False
+
+
+async def _activer(action, instance):
+    retour = action(instance)
+    if inspect.isawaitable(retour):
+        await retour
+
+
+async def _mettre_à_jour(gm, nom, instance, attr, valeur):
+    """Équivalent asynchrone de recv_msg.update et send_msg.update
+    """
+    if type(valeur) is coton.Différence:
+        valeur = coton.reconstruire(instance, attr._system_name, valeur)
+        if valeur is coton.DÉSYNCHRONISÉ:
+            return
+    setattr(instance, attr._name, valeur)
+    début = time.perf_counter_ns()
+    for action in attr._actions:
+        await _activer(action, instance)
+        if not instance._coton_groupé:
+            gm.vider_sortie(nom)
+    if instance._coton_groupé:
+        gm.vider_sortie(nom)
+    if gm._mesures.active:
+        gm._mesures.activation(nom, attr._system_name,
+                               time.perf_counter_ns() - début)
+
+
+async def acteur(gm, nom, boîte):
+    instance = gm.instance(nom)
+    routage = gm.routage(nom)
+    codecs = {n: gm.codec(n) for n in routage}
+
+    while True:
+        message = await boîte.get()
+        if message is coton._ARRÊT:
+            break
+        nom_système, valeur_codée = message
+        valeur = codecs[nom_système].décoder(valeur_codée)
+        await _mettre_à_jour(gm, nom, instance, routage[nom_système], valeur)
+
+
+async def acteur_autonome(gm, nom, boîte, entrée):
+    instance = gm.instance(nom)
+    routage = gm.routage(nom)
+    codecs = {n: gm.codec(n) for n in routage}
+
+    coopération = None
+    if inspect.isgeneratorfunction(entrée):
+        coopération = coton.Coopération(gm, nom, instance, entrée, boîte)
+
+    boîte.put((None, None))
+    while True:
+        message = await boîte.get()
+        if message is coton._ARRÊT:
+            break
+        nom_système, valeur_codée = message
+        if nom_système is None and coopération is not None:
+            coopération.reprendre()
+            await asyncio.sleep(0)
+        elif nom_système is None and valeur_codée is None:
+            début = time.perf_counter_ns()
+            await _activer(entrée, instance)
+            gm.vider_sortie(nom)
+            if gm._mesures.active:
+                gm._mesures.activation(nom, entrée.__name__,
+                                       time.perf_counter_ns() - début)
+
+            # Une file jamais vide ne rend pas la main à la boucle : on le
+            # fait explicitement avant la prochaine auto-activation
+            await asyncio.sleep(0)
+            boîte.put((None, None))
+        else:
+            valeur = codecs[nom_système].décoder(valeur_codée)
+            await _mettre_à_jour(gm, nom, instance, routage[nom_système],
+                                 valeur)
+            if coopération is not None:
+                coopération.recevoir(nom_système)
+
+
+class OrdonnanceurAsyncio:
+    """Tous les acteurs sont des coroutines d'une unique boucle asyncio
+
+    La boucle est exécutée par une tâche dédiée.
+    """
+
+    def __init__(self):
+        self._boucle = None
+        self._tâche = None
+        self._coroutines = list()
+
+    def démarrer(self, gm):
+        if gm._horloge.virtuelle:
+            raise ValueError("Horloge virtuelle non prise en charge")
+        self._boucle = asyncio.new_event_loop()
+        prêt = threading.Event()
+        self._tâche = threading.Thread(target=self._exécuter, name="asyncio",
+                                       args=(gm, prêt), daemon=True)
+        self._tâche.start()
+        prêt.wait()
+
+    def _exécuter(self, gm, prêt):
+        asyncio.set_event_loop(self._boucle)
+        self._boucle.run_until_complete(self._principal(gm, prêt))
+        self._boucle.close()
+
+    async def _principal(self, gm, prêt):
+        # Remplacement des files d'entrée, en conservant les messages déjà
+        # reçus
+        for nom in list(gm._files):
+            boîte = BoîteAsyncio(self._boucle)
+            ancienne = gm._files[nom]
+            try:
+                while True:
+                    boîte.put(ancienne.get_nowait())
+            except (queue.Empty, AttributeError):
+                pass
+            gm._files[nom] = boîte
+
+        for nom, boîte in gm._files.items():
+            entrée = gm.entrée(nom)
+            if entrée is not None:
+                c = acteur_autonome(gm, nom, boîte, entrée)
+            else:
+                c = acteur(gm, nom, boîte)
+            tâche = asyncio.ensure_future(c)
+            tâche.add_done_callback(functools.partial(self._signaler, nom))
+            self._coroutines.append(tâche)
+        prêt.set()
+
+        await asyncio.gather(*self._coroutines, return_exceptions=True)
+
+    def _signaler(self, nom, tâche):
+        """Signalement de l'exception ayant interrompu un acteur, par le
+        gestionnaire d'exceptions de la boucle
+        """
+        if not tâche.cancelled() and tâche.exception() is not None:
+            self._boucle.call_exception_handler({
+                "message": "Exception de l'acteur {!r}".format(nom),
+                "exception": tâche.exception(),
+                "future": tâche,
+            })
+
+    def arrêter(self):
+        def annuler():
+            for c in self._coroutines:
+                c.cancel()
+        self._boucle.call_soon_threadsafe(annuler)
+
+    def joindre(self, délai=None):
+        if self._tâche is not threading.current_thread():
+            self._tâche.join(délai)
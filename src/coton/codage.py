@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""Codage des données échangées entre acteurs.
+
+Le codage garantit l'isolation des données : chaque consommateur reçoit sa
+propre valeur, indépendante de celle du producteur. Un codec est choisi par
+échange, ou à défaut pour l'ensemble du système.
+"""
+
+import copy
+import dataclasses
+import pickle
+import sys
+
+
+# Types dont les instances sont immuables, et dont la transmission par simple
+# référence est donc sans danger
+_SCALAIRES = frozenset([type(None), bool, int, float, complex, str])
+
+# Champs des dataclasses figées déjà rencontrées (None si non figée)
+_CHAMPS = dict()
+
+# Option `slots` des dataclasses, apparue avec Python 3.10
+_CRÉNEAUX = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def figé(cls):
+    """Décorateur d'enregistrement immuable, à transmettre par référence
+
+    Équivaut à une dataclass figée : ses champs ne peuvent être réaffectés, et
+    doivent eux-mêmes être immuables. Elle est en outre dotée de `__slots__`
+    à partir de Python 3.10.
+    """
+    return dataclasses.dataclass(frozen=True, **_CRÉNEAUX)(cls)
+
+
+def immuable(valeur):
+    """Vrai si la valeur est profondément immuable : scalaire, bytes, tuple
+    ou frozenset d'immuables, dataclass figée aux champs immuables
+    """
+    restants = [valeur]
+    while restants:
+        valeur = restants.pop()
+        typ = type(valeur)
+        if typ in _SCALAIRES or typ is bytes:
+            continue
+        elif typ is tuple or typ is frozenset \
+                or (isinstance(valeur, tuple)
+                    and not hasattr(valeur, "__dict__")):
+            restants.extend(valeur)
+            continue
+
+        try:
+            champs = _CHAMPS[typ]
+        except KeyError:
+            champs = None
+            if dataclasses.is_dataclass(typ) \
+                    and typ.__dataclass_params__.frozen:
+                champs = tuple(c.name for c in dataclasses.fields(typ))
+            _CHAMPS[typ] = champs
+        if champs is None:
+            return False
+        restants.extend(getattr(valeur, c) for c in champs)
+    return True
+
+
+class Codec:
+    """Transformation d'une valeur en vue de sa transmission
+
+    La valeur est codée une seule fois par le producteur, puis décodée une
+    fois par consommateur.
+    """
+
+    def encoder(self, valeur):
+        raise NotImplementedError
+
+    def encoder_pour(self, valeur, nb_destinataires):
+        """Codage d'une valeur destinée à être décodée nb_destinataires fois
+        """
+        return self.encoder(valeur)
+
+    def décoder(self, valeur_codée):
+        raise NotImplementedError
+
+    def abandonner(self, valeur_codée):
+        """Renoncement au décodage d'une valeur, par exemple écartée par une
+        boîte bornée ou restée en attente à l'arrêt du système
+        """
+        pass
+
+
+class CodecPickle(Codec):
+    """Sérialisation par `pickle`
+
+    hors_bande → avec le protocole 5, les tampons volumineux (bytearray,
+                 PickleBuffer…) ne sont pas recopiés dans le flux mais
+                 transmis à côté, recopiés une seule fois quel que soit le
+                 nombre de consommateurs
+
+    Les scalaires immuables (int, str…) ne sont pas sérialisés.
+    """
+
+    def __init__(self, protocole=pickle.DEFAULT_PROTOCOL, *,
+                 hors_bande=False):
+        if hors_bande and protocole < 5:
+            raise ValueError("Les tampons hors bande nécessitent au moins le"
+                             " protocole 5")
+        self._protocole = protocole
+        self._hors_bande = hors_bande
+
+    def encoder(self, valeur):
+        if type(valeur) in _SCALAIRES:
+            return valeur
+        if not self._hors_bande:
+            return pickle.dumps(valeur, protocol=self._protocole)
+
+        tampons = list()
+        flux = pickle.dumps(valeur, protocol=self._protocole,
+                            buffer_callback=tampons.append)
+        if not tampons:
+            return flux
+        # Recopie unique, afin que le producteur reste libre de modifier ses
+        # tampons une fois la donnée émise
+        return (flux, [bytes(t.raw()) for t in tampons])
+
+    def décoder(self, valeur_codée):
+        if type(valeur_codée) is bytes:
+            return pickle.loads(valeur_codée)
+        elif type(valeur_codée) is tuple:
+            flux, tampons = valeur_codée
+            return pickle.loads(flux, buffers=tampons)
+        else:
+            return valeur_codée
+
+
+class CodecCopie(Codec):
+    """Recopie profonde, sans passer par une représentation binaire
+    """
+
+    def encoder(self, valeur):
+        return copy.deepcopy(valeur)
+
+    def décoder(self, valeur_codée):
+        return copy.deepcopy(valeur_codée)
+
+
+class CodecDirect(Codec):
+    """Transmission de la valeur elle-même, sans aucune recopie
+
+    À réserver aux valeurs immuables (int, str, tuple, dataclass figée…) : la
+    même instance est partagée entre le producteur et tous les consommateurs.
+    """
+
+    def encoder(self, valeur):
+        return valeur
+
+    def décoder(self, valeur_codée):
+        return valeur_codée
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""Points d'entrée inconditionnels coopératifs.
+
+Un point d'entrée inconditionnel écrit comme un générateur n'est pas appelé
+en boucle : il est exécuté jusqu'à son prochain `yield`, qui désigne ce qu'il
+attend avant d'être repris :
+
+  @entry
+  def produire(self):
+      while True:
+          self.liste.append(1)
+          yield Délai(0.1)                       # dans 0,1 s
+          yield Réception("consigne")            # à la réception d'une donnée
+          yield Condition(lambda a: a.consigne)  # dès que vrai
+          yield                                  # après les messages reçus
+
+Les sorties produites sont transmises à chaque attente. Entre deux reprises,
+l'acteur n'occupe aucune tâche de l'ordonnanceur "réserve", et les données
+qu'il reçoit sont stockées comme d'ordinaire. Une fois le générateur
+terminé, le point d'entrée est de nouveau appelé, comme tout point d'entrée
+inconditionnel.
+"""
+
+import collections
+import functools
+import time
+
+
+# Reprise après une durée, en secondes selon l'horloge du système
+Délai = collections.namedtuple("Délai", ["durée"])
+
+# Reprise dès que le prédicat, appelé avec l'instance, est vrai : aussitôt, ou
+# à la réception d'une donnée
+Condition = collections.namedtuple("Condition", ["prédicat"])
+
+
+class Réception:
+    """Reprise à la réception d'une des données désignées (noms d'attribut
+    ou d'échange), ou de n'importe laquelle à défaut
+    """
+
+    def __init__(self, *données):
+        self.données = données
+
+
+class Coopération:
+    """Exécution d'un point d'entrée générateur, repris seulement lorsque son
+    attente est satisfaite
+    """
+
+    def __init__(self, gm, nom, instance, entrée, boîte):
+        self._gm = gm
+        self._nom = nom
+        self._instance = instance
+        self._entrée = entrée
+        self._boîte = boîte
+        self._routage = gm.routage(nom)
+        self._générateur = entrée(instance)
+        self._attente = None
+
+    def reprendre(self):
+        """Exécution jusqu'à la prochaine attente non encore satisfaite
+        """
+        gm = self._gm
+        while True:
+            début = time.perf_counter_ns()
+            try:
+                attente = next(self._générateur)
+            except StopIteration:
+                # Nouvel appel, après les messages déjà reçus
+                self._générateur = self._entrée(self._instance)
+                attente = None
+            gm.vider_sortie(self._nom)
+            if gm._mesures.active:
+                gm._mesures.activation(self._nom, self._entrée.__name__,
+                                       time.perf_counter_ns() - début)
+
+            if attente is None:
+                self._boîte.put((None, None))
+                return
+            elif type(attente) is Délai:
+                gm._minuteur.programmer(
+                    functools.partial(self._boîte.put, (None, None)),
+                    attente.durée)
+                return
+            elif type(attente) is Réception:
+                self._attente = self._échanges(attente.données)
+                return
+            elif type(attente) is Condition:
+                if not attente.prédicat(self._instance):
+                    self._attente = attente
+                    return
+            else:
+                raise TypeError("Attente inconnue : {!r}".format(attente))
+
+    def recevoir(self, nom_système):
+        """Prise en compte d'une donnée reçue, qui peut satisfaire l'attente
+        """
+        attente = self._attente
+        if attente is None:
+            return
+        if type(attente) is Condition:
+            satisfaite = attente.prédicat(self._instance)
+        else:
+            satisfaite = not attente or nom_système in attente
+        if satisfaite:
+            self._attente = None
+            self.reprendre()
+
+    def _échanges(self, données):
+        """Noms d'échange des données désignées
+        """
+        noms = set()
+        for donnée in données:
+            if donnée in self._routage:
+                noms.add(donnée)
+                continue
+            trouvés = [n for n, att in self._routage.items()
+                       if att._name == "_" + donnée]
+            if not trouvés:
+                raise ValueError("Donnée inconnue de l'acteur {!r} : {!r}"
+                                 .format(self._nom, donnée))
+            noms.update(trouvés)
+        return frozenset(noms)
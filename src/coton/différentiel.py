@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""Transmission différentielle des données volumineuses.
+
+Plutôt que la valeur entière, le producteur transmet sa différence avec la
+valeur précédemment transmise, et chaque consommateur reconstruit la valeur
+à partir de la dernière reçue. Une image complète (image clé) est transmise
+périodiquement, ainsi qu'à la première émission.
+
+Les différences sont calculées pour :
+
+- les listes modifiées par la fin (ajouts, ou retraits) ;
+- les dictionnaires, dont les entrées ajoutées, retirées ou remplacées sont
+  seules transmises. Une entrée est considérée remplacée si sa valeur n'est
+  plus le même objet.
+
+Les éléments de ces listes et dictionnaires doivent être immuables (voir
+coton.immuable) : une modification sur place échapperait à la comparaison,
+et les consommateurs divergeraient sans le savoir. Un élément muable lève
+une TypeError. Toute autre valeur est transmise entière.
+
+Seules les instances recevant toutes les valeurs du producteur reçoivent
+des différences. Celles dont la réception est restreinte (filtre, cadence,
+répartition autre que la diffusion), ainsi que les autres systèmes, reçoivent
+toujours la valeur entière.
+
+Chaque différence porte le numéro de version auquel elle s'applique. Un
+consommateur ayant tout de même manqué une version (boîte bornée…) conserve
+sa valeur, et demande une image clé au producteur ; à défaut d'être entendu
+(producteur dans un autre processus), il attend la prochaine image clé
+périodique.
+"""
+
+import collections
+
+import coton
+
+
+# Genres de différence
+IMAGE = "image"
+ÉTENDRE = "étendre"
+TRONQUER = "tronquer"
+MODIFIER = "modifier"
+
+Différence = collections.namedtuple(
+    "Différence", ["producteur", "version", "genre", "contenu"])
+
+# Retour de `reconstruire` lorsque la différence ne peut être appliquée
+DÉSYNCHRONISÉ = object()
+
+# Entrée absente d'un dictionnaire
+_ABSENT = object()
+
+
+class Émetteur:
+    """Suivi des valeurs transmises par un producteur pour un échange
+
+    période → nombre d'émissions entre deux images clés
+    """
+
+    def __init__(self, période):
+        self._période = période
+        self._depuis_image = période
+        self._référence = None
+        self.version = 0
+        self.image_demandée = False
+
+    def différence(self, producteur, valeur):
+        """Différence à transmettre pour la nouvelle valeur
+        """
+        ancienne = self._référence
+        genre, contenu = IMAGE, valeur
+        if self._depuis_image < self._période and not self.image_demandée \
+                and type(valeur) is type(ancienne):
+            if type(valeur) is list:
+                genre, contenu = _différence_liste(ancienne, valeur)
+            elif type(valeur) is dict:
+                genre, contenu = _différence_dict(ancienne, valeur)
+
+        # Seuls les éléments nouvellement retenus sont vérifiés, les autres
+        # l'ayant été lors de leur propre transmission
+        if genre == IMAGE:
+            if type(valeur) is list:
+                _vérifier(valeur)
+                self._référence = list(valeur)
+            elif type(valeur) is dict:
+                _vérifier(valeur.values())
+                self._référence = dict(valeur)
+            else:
+                self._référence = None
+            self._depuis_image = 0
+            self.image_demandée = False
+        else:
+            if genre == ÉTENDRE:
+                _vérifier(contenu)
+                self._référence = ancienne + contenu
+            elif genre == TRONQUER:
+                self._référence = ancienne[:contenu]
+            else:
+                modifiés, retirés = contenu
+                _vérifier(modifiés.values())
+                self._référence = dict(ancienne)
+                self._référence.update(modifiés)
+                for k in retirés:
+                    del self._référence[k]
+            self._depuis_image += 1
+        self.version += 1
+        return Différence(producteur, self.version, genre, contenu)
+
+
+def _vérifier(éléments):
+    """Refus d'un élément muable, dont les modifications sur place ne
+    pourraient être détectées
+    """
+    for élément in éléments:
+        if not coton.immuable(élément):
+            raise TypeError("Élément muable d'une donnée différentielle :"
+                            " {!r}".format(élément))
+
+
+def _différence_liste(ancienne, nouvelle):
+    n = len(ancienne)
+    if len(nouvelle) >= n and nouvelle[:n] == ancienne:
+        return ÉTENDRE, nouvelle[n:]
+    elif nouvelle == ancienne[:len(nouvelle)]:
+        return TRONQUER, len(nouvelle)
+    return IMAGE, nouvelle
+
+
+def _différence_dict(ancien, nouveau):
+    modifiés = {k: v for k, v in nouveau.items()
+                if ancien.get(k, _ABSENT) is not v}
+    retirés = [k for k in ancien if k not in nouveau]
+    if len(modifiés) + len(retirés) >= len(nouveau):
+        return IMAGE, nouveau
+    return MODIFIER, (modifiés, retirés)
+
+
+def reconstruire(obj, nom_échange, différence):
+    """Valeur reconstruite par un consommateur, ou DÉSYNCHRONISÉ
+
+    La dernière valeur reçue de chaque producteur est conservée à part,
+    l'acteur restant libre de modifier la sienne : les versions sont propres
+    à chaque producteur d'un échange.
+    """
+    états = obj.__dict__.setdefault("_coton_différences", dict())
+    clé = (nom_échange, différence.producteur)
+    état = états.get(clé)
+    genre, contenu = différence.genre, différence.contenu
+
+    if genre == IMAGE:
+        référence = contenu
+    elif état is None or état[0] != différence.version - 1:
+        coton.GM.resynchroniser(différence.producteur, nom_échange)
+        return DÉSYNCHRONISÉ
+    elif genre == ÉTENDRE:
+        référence = état[1] + contenu
+    elif genre == TRONQUER:
+        référence = état[1][:contenu]
+    else:
+        modifiés, retirés = contenu
+        référence = dict(état[1])
+        référence.update(modifiés)
+        for k in retirés:
+            del référence[k]
+
+    états[clé] = (différence.version, référence)
+    return type(référence)(référence) \
+        if type(référence) in (list, dict) else référence
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""Journal binaire des échanges, et rejeu hors ligne.
+
+Chaque donnée transmise est ajoutée au journal avec son heure d'émission
+(selon l'horloge du système), son producteur et le nom de l'échange. La
+donnée y figure sérialisée par `pickle` : avec le codec par défaut, c'est
+directement la valeur codée, déjà produite pour la transmission, qui est
+écrite. Les données transmises à personne ne sont pas enregistrées.
+
+Format : un entête de fichier, puis une suite d'enregistrements, chacun
+composé d'un entête de taille fixe (heure, tailles des champs) suivi du nom
+du producteur, du nom de l'échange (UTF-8) et de la donnée. Un
+enregistrement tronqué, par exemple après un arrêt brutal, termine le
+journal.
+
+Avec l'ordonnanceur "processus", seules les données émises par les acteurs
+du processus coordinateur sont enregistrées.
+"""
+
+import collections
+import mmap
+import os
+import pickle
+import struct
+import threading
+
+import coton
+from .codage import CodecPickle
+
+
+_MAGIQUE = b"COTON-J1"
+
+# Entête d'un enregistrement : heure, tailles du producteur, de l'échange et
+# de la donnée
+_ENTÊTE = struct.Struct("<dHHI")
+
+Enregistrement = collections.namedtuple(
+    "Enregistrement", ["heure", "producteur", "échange", "données"])
+
+
+class Enregistreur:
+    """Écriture d'un journal, en ajout à la fin du fichier
+    """
+
+    def __init__(self, chemin, taille_tampon=1 << 20):
+        self._flux = open(chemin, "ab", buffering=taille_tampon)
+        self._verrou = threading.Lock()
+        if self._flux.tell() == 0:
+            self._flux.write(_MAGIQUE)
+
+    def enregistrer(self, heure, producteur, nom_échange, codec, valeur,
+                    valeur_codée):
+        if type(valeur_codée) is bytes and isinstance(codec, CodecPickle):
+            données = valeur_codée
+        else:
+            données = pickle.dumps(valeur, protocol=pickle.HIGHEST_PROTOCOL)
+        producteur = producteur.encode()
+        nom_échange = nom_échange.encode()
+        entête = _ENTÊTE.pack(heure, len(producteur), len(nom_échange),
+                              len(données))
+        with self._verrou:
+            self._flux.write(entête)
+            self._flux.write(producteur)
+            self._flux.write(nom_échange)
+            self._flux.write(données)
+
+    def vider(self):
+        """Écriture effective des enregistrements en tampon
+        """
+        with self._verrou:
+            self._flux.flush()
+
+    def fermer(self):
+        with self._verrou:
+            self._flux.close()
+
+
+class Journal:
+    """Lecture d'un journal, projeté en mémoire
+
+    S'utilise comme un itérable d'Enregistrement, dont la donnée est encore
+    sérialisée (voir `valeur`).
+    """
+
+    def __init__(self, chemin):
+        self._carte = None
+        with open(chemin, "rb") as f:
+            if f.read(len(_MAGIQUE)) not in (b"", _MAGIQUE):
+                raise ValueError("Journal invalide : {}".format(chemin))
+            if os.fstat(f.fileno()).st_size > len(_MAGIQUE):
+                self._carte = mmap.mmap(f.fileno(), 0,
+                                        access=mmap.ACCESS_READ)
+
+    def __iter__(self):
+        carte = self._carte
+        if carte is None:
+            return
+        position = len(_MAGIQUE)
+        fin = len(carte)
+        while position + _ENTÊTE.size <= fin:
+            heure, n_p, n_é, n_d = _ENTÊTE.unpack_from(carte, position)
+            début = position + _ENTÊTE.size
+            position = début + n_p + n_é + n_d
+            if position > fin:
+                break
+            yield Enregistrement(
+                heure,
+                carte[début:début + n_p].decode(),
+                carte[début + n_p:début + n_p + n_é].decode(),
+                carte[début + n_p + n_é:position])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def fermer(self):
+        if self._carte is not None:
+            self._carte.close()
+            self._carte = None
+
+
+def valeur(enregistrement):
+    """Donnée d'un enregistrement
+    """
+    return pickle.loads(enregistrement.données)
+
+
+def rejouer(chemin, acteurs=None, rythme=True):
+    """Réinjection des données d'un journal dans le système en cours
+    d'exécution
+
+    acteurs → instances (noms) ou types d'acteurs (classes ou noms)
+              alimentés, par défaut tous les destinataires de chaque donnée
+    rythme → respect des écarts d'heure d'origine (selon l'horloge du
+             système), sinon rejeu au plus vite
+
+    Les données d'échanges inconnus du système sont ignorées. Retourne le
+    nombre de données rejouées.
+    """
+    gm = coton.GM
+    cibles = None
+    if acteurs is not None:
+        cibles = list()
+        for acteur in acteurs:
+            nom = acteur if isinstance(acteur, str) else acteur.__name__
+            cibles.extend(gm.répliques(nom) if nom in gm._types else [nom])
+    destinataires = dict()
+
+    nombre = 0
+    origine = None
+    with Journal(chemin) as journal:
+        for enregistrement in journal:
+            if enregistrement.échange not in gm._échanges:
+                continue
+            if rythme:
+                if origine is None:
+                    origine = (enregistrement.heure, gm._horloge.heure())
+                else:
+                    gm._horloge.dormir(origine[1] - origine[0]
+                                       + enregistrement.heure
+                                       - gm._horloge.heure())
+
+            if cibles is None:
+                gm.transmettre(enregistrement.producteur,
+                               enregistrement.échange, valeur(enregistrement))
+            else:
+                nom_échange = enregistrement.échange
+                noms = destinataires.get(nom_échange)
+                if noms is None:
+                    noms = destinataires[nom_échange] = [
+                        n for n in cibles
+                        if isinstance(gm.routage(n).get(nom_échange),
+                                      coton.recv_msg)]
+                if noms:
+                    valeur_codée = gm.codec(nom_échange).encoder_pour(
+                        valeur(enregistrement), len(noms))
+                    for n in noms:
+                        gm._files[n].put((nom_échange, valeur_codée))
+            nombre += 1
+    return nombre
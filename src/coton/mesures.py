@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""Mesures de fonctionnement d'un système en cours d'exécution.
+
+Chaque compteur n'est mis à jour que par une seule tâche : celle de l'acteur
+concerné, ou le minuteur du système pour les remises de données retenues par
+une cadence. Aucun verrou n'est donc pris lors des mesures, seulement lors de
+la création d'un compteur ou de la prise d'un instantané.
+
+Les durées sont regroupées en histogrammes à classes logarithmiques (une
+classe par puissance de deux de nanosecondes), dont les centiles sont donc
+approchés par excès.
+
+Avec l'ordonnanceur "processus", seuls les acteurs du processus coordinateur
+sont mesurés.
+"""
+
+import json
+import sys
+import threading
+import time
+
+
+class Histogramme:
+    """Répartition de durées exprimées en nanosecondes
+    """
+
+    __slots__ = ("classes", "nombre", "total", "maximum")
+
+    def __init__(self):
+        self.classes = [0] * 64
+        self.nombre = 0
+        self.total = 0
+        self.maximum = 0
+
+    def ajouter(self, durée):
+        self.classes[min(durée.bit_length(), 63)] += 1
+        self.nombre += 1
+        self.total += durée
+        if durée > self.maximum:
+            self.maximum = durée
+
+    def centile(self, p):
+        """Borne supérieure, en nanosecondes, du centile demandé
+        """
+        seuil = p / 100.0 * self.nombre
+        cumul = 0
+        for i, n in enumerate(self.classes):
+            cumul += n
+            if n and cumul >= seuil:
+                return min(1 << i, self.maximum)
+        return 0
+
+    def instantané(self):
+        return {
+            "nombre": self.nombre,
+            "moyenne_us": (self.total / self.nombre / 1000.0
+                           if self.nombre else 0.0),
+            "p50_us": self.centile(50) / 1000.0,
+            "p99_us": self.centile(99) / 1000.0,
+            "max_us": self.maximum / 1000.0,
+        }
+
+
+class Mesures:
+    """Collecte des mesures d'un GrandMamamouchi
+    """
+
+    def __init__(self):
+        self.active = True
+        self._verrou = threading.Lock()
+        self._activations = dict()
+        self._codages = dict()
+        self._livraisons = dict()
+        self._relâchements = dict()
+        self._tâche = None
+        self._fin = None
+
+    def _histogramme(self, table, clé):
+        h = table.get(clé)
+        if h is None:
+            with self._verrou:
+                h = table.setdefault(clé, Histogramme())
+        return h
+
+    def activation(self, nom, clé, durée):
+        """Durée de traitement d'une donnée reçue (clé : nom de l'échange) ou
+        d'une activation inconditionnelle (clé : nom du point d'entrée)
+        """
+        self._histogramme(self._activations, (nom, clé)).ajouter(durée)
+
+    def codage(self, nom, nom_échange, durée, nb_destinataires):
+        """Durée de codage d'une donnée émise, et nombre de remises
+        """
+        clé = (nom, nom_échange)
+        self._histogramme(self._codages, clé).ajouter(durée)
+        self._livraisons[clé] = self._livraisons.get(clé, 0) + nb_destinataires
+
+    def relâchement(self, nom, nom_échange):
+        """Remise, par le minuteur, d'une donnée retenue par une cadence
+        """
+        clé = (nom, nom_échange)
+        self._relâchements[clé] = self._relâchements.get(clé, 0) + 1
+
+    def instantané(self, gm):
+        """État courant des mesures, par acteur et par échange
+        """
+        with self._verrou:
+            activations = list(self._activations.items())
+            codages = list(self._codages.items())
+            livraisons = dict(self._livraisons)
+            for clé, nombre in list(self._relâchements.items()):
+                livraisons[clé] = livraisons.get(clé, 0) + nombre
+
+        acteurs = dict()
+        for nom, boîte in list(gm._files.items()):
+            acteurs[nom] = {"file": boîte.qsize(), "reçus": 0, "émis": 0,
+                            "activations": dict()}
+        for (nom, clé), h in activations:
+            acteur = acteurs.setdefault(nom, {"file": 0, "reçus": 0,
+                                              "émis": 0,
+                                              "activations": dict()})
+            acteur["activations"][clé] = h.instantané()
+            if clé in gm._échanges:
+                acteur["reçus"] += h.nombre
+
+        échanges = dict()
+        for (nom, nom_échange), h in codages:
+            if nom in acteurs:
+                acteurs[nom]["émis"] += h.nombre
+            échange = échanges.setdefault(nom_échange, {
+                "transmissions": 0, "livraisons": 0, "codage": dict()})
+            échange["transmissions"] += h.nombre
+            échange["livraisons"] += livraisons.get((nom, nom_échange), 0)
+            échange["codage"][nom] = h.instantané()
+
+        return {"heure": time.time(), "acteurs": acteurs,
+                "échanges": échanges}
+
+    def publier(self, gm, période, flux=None):
+        """Écriture périodique d'un instantané (une ligne JSON), ou arrêt de
+        cette écriture si la période est nulle
+        """
+        if self._tâche is not None:
+            self._fin.set()
+            self._tâche.join()
+            self._tâche = None
+        if not période:
+            return
+
+        self._fin = threading.Event()
+
+        def écrire(fin):
+            while not fin.wait(période):
+                f = flux or sys.stderr
+                f.write(json.dumps(self.instantané(gm), ensure_ascii=False))
+                f.write("\n")
+                f.flush()
+
+        self._tâche = threading.Thread(target=écrire, args=(self._fin,),
+                                       name="mesures", daemon=True)
+        self._tâche.start()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""Transmission de données volumineuses par mémoire partagée.
+
+La donnée (tout objet exposant un tampon contigu : bytes, bytearray,
+array.array, tableau numpy…) est recopiée une seule fois, par le producteur,
+dans un segment de mémoire partagée. Chaque consommateur en reçoit une vue en
+lecture seule, sans recopie, qu'il soit dans le même processus ou dans un
+autre (ordonnanceur "processus").
+
+Le segment porte le nombre de consommateurs restant à le libérer : il est
+détruit dès que le dernier l'a fait. Une vue est libérée explicitement
+(`libérer`, ou en sortie d'un bloc `with`), ou à défaut dès qu'elle n'est
+plus référencée, typiquement à la réception de la valeur suivante.
+
+Une donnée écartée par une boîte bornée, ou restée en attente à l'arrêt du
+système, est libérée par le cadriciel.
+"""
+
+import collections
+import multiprocessing
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+from .codage import Codec
+
+
+# Entête d'un segment : nombre de libérations attendues
+_ENTÊTE = struct.Struct("q")
+
+Segment = collections.namedtuple("Segment", ["nom", "taille"])
+
+
+def _ouvrir(**kwargs):
+    """Ouverture d'un segment, dont la destruction est gérée par Coton
+
+    Sans cela, le suivi de ressources de multiprocessing détruirait le
+    segment à la fin du processus qui l'a ouvert, fût-il encore utilisé.
+    """
+    segment = shared_memory.SharedMemory(**kwargs)
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class VuePartagée:
+    """Vue en lecture seule d'une donnée en mémoire partagée
+    """
+
+    def __init__(self, segment, verrou):
+        self._segment = _ouvrir(name=segment.nom)
+        self._verrou = verrou
+        self._tampon = self._segment.buf[_ENTÊTE.size:
+                                         _ENTÊTE.size + segment.taille]
+        self._vue = self._tampon.toreadonly()
+
+    @property
+    def données(self):
+        """Contenu, sous forme de memoryview en lecture seule
+        """
+        if self._segment is None:
+            raise ValueError("Vue déjà libérée")
+        return self._vue
+
+    def __len__(self):
+        return len(self.données)
+
+    def __getitem__(self, index):
+        return self.données[index]
+
+    def __bytes__(self):
+        return self.données.tobytes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.libérer()
+
+    def __del__(self):
+        self.libérer()
+
+    def libérer(self):
+        """Renoncement à la vue, et destruction du segment s'il s'agissait
+        de la dernière
+        """
+        if getattr(self, "_segment", None) is None:
+            return
+        segment, self._segment = self._segment, None
+        self._vue.release()
+        self._tampon.release()
+        with self._verrou:
+            restants = _ENTÊTE.unpack_from(segment.buf, 0)[0] - 1
+            _ENTÊTE.pack_into(segment.buf, 0, restants)
+        try:
+            segment.close()
+        except BufferError:
+            # Des vues dérivées sont encore utilisées par le consommateur :
+            # la projection sera défaite avec elles
+            pass
+        if restants == 0:
+            # unlink retire lui-même le segment du suivi de ressources
+            resource_tracker.register(segment._name, "shared_memory")
+            segment.unlink()
+
+
+class CodecPartagé(Codec):
+    """Transmission par mémoire partagée, en une seule recopie
+
+    Les consommateurs reçoivent une VuePartagée.
+
+    Le codec doit être créé avant le démarrage du système, afin d'être
+    partagé par les éventuels processus de travail.
+    """
+
+    def __init__(self):
+        self._verrou = multiprocessing.Lock()
+
+    def encoder(self, valeur):
+        return self.encoder_pour(valeur, 1)
+
+    def encoder_pour(self, valeur, nb_destinataires):
+        if nb_destinataires == 0:
+            return None
+        données = memoryview(valeur).cast("B")
+        taille = données.nbytes
+        segment = _ouvrir(create=True, size=_ENTÊTE.size + max(taille, 1))
+        _ENTÊTE.pack_into(segment.buf, 0, nb_destinataires)
+        segment.buf[_ENTÊTE.size:_ENTÊTE.size + taille] = données
+        retour = Segment(segment.name, taille)
+        segment.close()
+        return retour
+
+    def décoder(self, valeur_codée):
+        return VuePartagée(valeur_codée, self._verrou)
+
+    def abandonner(self, valeur_codée):
+        if valeur_codée is not None:
+            self.décoder(valeur_codée).libérer()
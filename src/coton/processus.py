@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""Exécution d'acteurs dans des processus distincts.
+
+Les acteurs placés dans un processus de travail y disposent chacun de leur
+tâche, comme avec l'ordonnanceur par défaut, mais n'y partagent plus le
+verrou global de l'interpréteur avec les autres processus.
+
+Le processus initial reste l'unique coordinateur : il héberge les acteurs non
+placés, et relaie les données entre processus. Les données transitent déjà
+codées, telles que produites par `GrandMamamouchi.transmettre`.
+
+Les processus de travail sont créés par duplication (`fork`) afin d'hériter
+des types d'acteurs déclarés, sans que ceux-ci n'aient à être importables :
+cet ordonnanceur n'est donc disponible que sur les systèmes POSIX.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+
+import coton
+
+
+# Message de service : demande d'arrêt du système, ou arrêt d'un processus
+_ARRÊT = (None, None)
+
+
+def _remettre(boîte, message):
+    """Remise d'un message relayé, ou d'un lot de messages (liste)
+    """
+    if type(message) is list:
+        boîte.put_lot(message)
+    else:
+        boîte.put(message)
+
+
+class BoîteDistante:
+    """File d'entrée d'un acteur hébergé par un autre processus
+    """
+
+    def __init__(self, file, nom):
+        self._file = file
+        self._nom = nom
+
+    def put(self, message):
+        self._file.put((self._nom, message))
+
+    put_hors_limite = put
+
+    def put_lot(self, messages):
+        self._file.put((self._nom, messages))
+
+    def qsize(self):
+        return 0
+
+
+class OrdonnanceurProcessus:
+    """Placement d'acteurs dans des processus de travail
+
+    groupes → placement des acteurs. Chaque élément désigne un type d'acteur
+              (classe ou nom) ou une instance (nom), ou un ensemble de
+              ceux-ci à placer dans un même processus. Les acteurs non
+              mentionnés restent dans le processus coordinateur. Par défaut,
+              chaque type d'acteur dispose de son propre processus.
+    """
+
+    def __init__(self, groupes=None):
+        self._groupes = groupes
+        self._index = None
+        self._placement = dict()
+        self._processus = list()
+        self._entrées = list()
+        self._sortie = None
+        self._relais = None
+        self._local = None
+
+    def démarrer(self, gm):
+        if gm._horloge.virtuelle:
+            raise ValueError("Horloge virtuelle non prise en charge")
+        contexte = multiprocessing.get_context("fork")
+
+        groupes = self._groupes
+        if groupes is None:
+            groupes = list(gm._types)
+        for index, groupe in enumerate(groupes):
+            if isinstance(groupe, (str, type)):
+                groupe = [groupe]
+            for nom in groupe:
+                nom = nom if isinstance(nom, str) else nom.__name__
+                if nom in gm._types:
+                    instances = gm.répliques(nom)
+                elif nom in gm._files:
+                    instances = [nom]
+                else:
+                    raise ValueError("Acteur inconnu : {!r}".format(nom))
+                for instance in instances:
+                    self._placement[instance] = index
+        nb_processus = len(groupes)
+
+        self._sortie = contexte.Queue()
+        self._entrées = [contexte.Queue() for _ in range(nb_processus)]
+
+        # Création des processus avant toute tâche du coordinateur, afin de
+        # ne dupliquer aucun verrou en cours d'utilisation
+        for index in range(nb_processus):
+            p = contexte.Process(target=self._travailleur, args=(gm, index),
+                                 name="coton-{}".format(index), daemon=True)
+            self._processus.append(p)
+            p.start()
+
+        # Les acteurs déportés sont désormais joints via leur processus
+        for nom, index in self._placement.items():
+            gm._files[nom] = BoîteDistante(self._entrées[index], nom)
+
+        self._relais = threading.Thread(target=self._relayer, args=(gm,),
+                                        name="relais", daemon=True)
+        self._relais.start()
+
+        locaux = [n for n in gm._files if n not in self._placement]
+        self._local = coton.OrdonnanceurTâches(locaux)
+        self._local.démarrer(gm)
+
+    def _travailleur(self, gm, index):
+        """Point d'entrée d'un processus de travail
+        """
+        self._index = index
+        # Le journal, hérité avec ses tampons, et les liens vers d'autres
+        # systèmes restent au seul coordinateur
+        gm._journal = None
+        gm._liens.clear()
+        gm._plan.clear()
+        locaux = [n for n, i in self._placement.items() if i == index]
+
+        # Tout envoi vers un acteur non local passe par le coordinateur
+        for nom in list(gm._files):
+            if nom not in locaux:
+                gm._files[nom] = BoîteDistante(self._sortie, nom)
+
+        # Minuteur propre au processus, pour les attentes des points
+        # d'entrée coopératifs
+        gm._minuteur = coton.Minuteur(gm._horloge)
+        self._local = coton.OrdonnanceurTâches(locaux)
+        self._local.démarrer(gm)
+        gm._minuteur.démarrer()
+
+        entrée = self._entrées[index]
+        while True:
+            nom, message = entrée.get()
+            if nom is None:
+                break
+            _remettre(gm._files[nom], message)
+
+        gm._minuteur.arrêter()
+        self._local.arrêter()
+        self._local.joindre()
+        gm._minuteur.joindre()
+
+        # Le processus se termine sans collecte : on libère explicitement ce
+        # qui peut l'être (voir coton.partage)
+        gm.purger()
+        gm._instances.clear()
+
+    def _relayer(self, gm):
+        """Acheminement des données émises par les processus de travail
+        """
+        while True:
+            nom, message = self._sortie.get()
+            if nom is None:
+                gm.arrêter()
+                break
+            _remettre(gm._files[nom], message)
+
+    def arrêter(self):
+        if self._index is not None:
+            # Depuis un processus de travail, l'arrêt est demandé au
+            # coordinateur
+            self._sortie.put(_ARRÊT)
+            return
+        self._sortie.put(_ARRÊT)
+        self._local.arrêter()
+
+    def joindre(self, délai=None):
+        self._local.joindre(délai)
+        if self._relais is not threading.current_thread():
+            self._relais.join(délai)
+
+        # Les processus de travail ne sont arrêtés qu'une fois le
+        # coordinateur silencieux, afin que nulle donnée ne leur parvienne
+        # après leur arrêt
+        for entrée in self._entrées:
+            entrée.put(_ARRÊT)
+        # Les données émises entre-temps sont écartées au fil de l'attente :
+        # un processus de travail ne se termine qu'une fois ses envois vidés
+        échéance = None if délai is None else time.monotonic() + délai
+        for p in self._processus:
+            while p.is_alive():
+                self._écarter()
+                attente = 0.1
+                if échéance is not None:
+                    attente = min(attente, échéance - time.monotonic())
+                    if attente <= 0.0:
+                        break
+                p.join(attente)
+        self._écarter()
+
+    def _écarter(self):
+        """Abandon des données émises par les processus de travail après
+        l'arrêt du relais
+        """
+        try:
+            while True:
+                nom, message = self._sortie.get_nowait()
+                if nom is None:
+                    continue
+                for m in message if type(message) is list else [message]:
+                    if m[0] is not None:
+                        coton._abandonner(m)
+        except queue.Empty:
+            pass
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+
+"""Liaison de plusieurs systèmes par sockets TCP ou Unix.
+
+Chaque système (processus, voire machine) déclare ses propres acteurs, puis
+se relie aux autres par un Transport :
+
+  transport = coton.réseau.Transport("capteurs", clé=b"secret commun")
+  transport.écouter(("127.0.0.1", 4500))    # ou transport.connecter(…)
+  coton.run()
+
+À la connexion, chaque système s'authentifie d'abord auprès de l'autre, puis
+annonce les échanges qu'il produit et ceux
+qu'il consomme. Les données d'un échange consommé à distance y sont alors
+envoyées telles que codées par `GrandMamamouchi.transmettre`, sans nouveau
+codage : les systèmes reliés doivent donc employer les mêmes codecs, et
+`CodecPartagé` n'y est pas utilisable.
+
+Les données ne sont pas relayées d'un système à l'autre : chaque système
+doit être directement relié à tous ceux dont il consomme les données.
+
+Les messages à destination d'un système sont envoyés par lots, par une
+tâche dédiée. Lorsque la connexion est rompue, ils sont conservés (dans la
+limite de la capacité du lien, les plus anciens étant écartés) jusqu'à ce
+que la connexion soit rétablie : par le côté qui s'est connecté, qui réessaie
+périodiquement. Le lot en cours d'envoi lors de la rupture est envoyé de
+nouveau, et peut donc être reçu deux fois.
+
+Les topologies et les lots sont sérialisés par `pickle`. Aussi, avant toute
+désérialisation, chaque système prouve à l'autre qu'il connaît la clé
+commune, en signant (HMAC) un défi aléatoire, comme le fait
+`multiprocessing.connection`. Par défaut, la clé est celle du processus
+(`multiprocessing.current_process().authkey`), que seuls partagent les
+processus qu'il crée : des systèmes indépendants doivent donc convenir d'une
+clé. Cette authentification ne chiffre pas les données.
+
+Avec l'ordonnanceur "processus", seuls les acteurs du processus coordinateur
+sont reliés aux autres systèmes.
+"""
+
+import collections
+import hmac
+import multiprocessing
+import os
+import pickle
+import socket
+import struct
+import threading
+
+import coton
+
+
+# Genres de trame
+_TOPOLOGIE = 0
+_LOT = 1
+
+# Entête de trame : genre et taille du contenu
+_TRAME = struct.Struct("<BI")
+
+# Taille des défis d'authentification, en octets, et empreinte des signatures
+_DÉFI = 32
+_EMPREINTE = "sha256"
+
+
+def _famille(adresse):
+    """Famille de socket d'une adresse : chemin (Unix) ou (hôte, port)
+    """
+    if isinstance(adresse, (str, bytes, os.PathLike)):
+        return socket.AF_UNIX
+    return socket.AF_INET6 if ":" in adresse[0] else socket.AF_INET
+
+
+def _envoyer(sock, genre, données):
+    sock.sendall(_TRAME.pack(genre, len(données)))
+    sock.sendall(données)
+
+
+def _lire(flux, taille):
+    données = flux.read(taille)
+    if len(données) < taille:
+        raise EOFError
+    return données
+
+
+def _recevoir(flux):
+    genre, taille = _TRAME.unpack(_lire(flux, _TRAME.size))
+    return genre, _lire(flux, taille)
+
+
+def _authentifier(sock, flux, clé, accepté):
+    """Authentification mutuelle par défi, vraie si l'autre système connaît
+    la clé
+
+    accepté → vrai du côté ayant accepté la connexion. Chaque côté signe avec
+              son rôle, afin qu'un défi renvoyé tel quel ne puisse servir
+              de réponse.
+    """
+    rôle, rôle_distant = (b"A", b"C") if accepté else (b"C", b"A")
+    défi = os.urandom(_DÉFI)
+    sock.sendall(défi)
+    sock.sendall(hmac.new(clé, rôle + _lire(flux, _DÉFI),
+                          _EMPREINTE).digest())
+    attendue = hmac.new(clé, rôle_distant + défi, _EMPREINTE).digest()
+    return hmac.compare_digest(_lire(flux, len(attendue)), attendue)
+
+
+class Lien:
+    """Représentant local d'un autre système
+
+    Les messages qui lui sont destinés sont mis en attente, puis envoyés par
+    lots par une tâche dédiée.
+    """
+
+    def __init__(self, nom, consommés, produits, capacité):
+        self.nom = nom
+        self.consommés = frozenset(consommés)
+        self.produits = frozenset(produits)
+        self._capacité = capacité
+        self._file = collections.deque()
+        self._condition = threading.Condition()
+        self._socket = None
+        self._fermé = False
+        self._tâche = threading.Thread(target=self._émettre,
+                                       name="lien {}".format(nom),
+                                       daemon=True)
+        self._tâche.start()
+
+    def put(self, message):
+        with self._condition:
+            if len(self._file) >= self._capacité:
+                coton._abandonner(self._file.popleft())
+            self._file.append(message)
+            self._condition.notify()
+
+    def connecté(self):
+        return self._socket is not None
+
+    def attacher(self, sock):
+        """Reprise des envois, par une nouvelle connexion
+        """
+        with self._condition:
+            self._socket = sock
+            self._condition.notify()
+
+    def détacher(self, sock):
+        with self._condition:
+            if self._socket is sock:
+                self._socket = None
+
+    def fermer(self):
+        with self._condition:
+            self._fermé = True
+            self._condition.notify()
+        self._tâche.join()
+
+    def _émettre(self):
+        while True:
+            with self._condition:
+                while not self._fermé \
+                        and (not self._file or self._socket is None):
+                    self._condition.wait()
+                if self._fermé:
+                    return
+                lot = list(self._file)
+                self._file.clear()
+                sock = self._socket
+
+            try:
+                _envoyer(sock, _LOT, pickle.dumps(
+                    lot, protocol=pickle.HIGHEST_PROTOCOL))
+            except OSError:
+                # Nouvel envoi du lot après reconnexion
+                with self._condition:
+                    self._file.extendleft(reversed(lot))
+                    if self._socket is sock:
+                        self._socket = None
+
+
+class Transport:
+    """Liaison du système courant à d'autres systèmes
+
+    nom → nom du système, unique parmi les systèmes reliés, par défaut
+          d'après l'hôte et le processus
+    capacité → nombre maximal de messages en attente par système relié
+    clé → secret commun aux systèmes reliés (bytes), par défaut la clé
+          d'authentification du processus
+    """
+
+    def __init__(self, nom=None, capacité=100000, clé=None):
+        self.nom = nom or "{}:{}".format(socket.gethostname(), os.getpid())
+        self._gm = coton.GM
+        self._capacité = capacité
+        if clé is None:
+            clé = multiprocessing.current_process().authkey
+        self._clé = bytes(clé)
+        self._liens = dict()
+        self._condition = threading.Condition()
+        self._sockets = set()
+        self._fin = threading.Event()
+
+    def écouter(self, adresse):
+        """Attente des connexions d'autres systèmes
+
+        Retourne l'adresse effective, utile avec un port TCP nul (choisi par
+        le système d'exploitation).
+        """
+        serveur = socket.socket(_famille(adresse), socket.SOCK_STREAM)
+        if serveur.family != socket.AF_UNIX:
+            serveur.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        serveur.bind(adresse)
+        serveur.listen()
+        self._suivre(serveur)
+        threading.Thread(target=self._accepter, args=(serveur,),
+                         name="réseau", daemon=True).start()
+        return serveur.getsockname()
+
+    def connecter(self, adresse, période=0.5):
+        """Connexion à un autre système, rétablie en cas de rupture
+
+        période → délai entre deux tentatives de connexion, en secondes
+        """
+        threading.Thread(target=self._connecter, args=(adresse, période),
+                         name="réseau", daemon=True).start()
+
+    def attendre(self, nombre=1, délai=None):
+        """Attente de la connexion d'au moins `nombre` systèmes
+
+        Retourne vrai si ces systèmes sont effectivement connectés.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: sum(lien.connecté()
+                            for lien in self._liens.values()) >= nombre,
+                délai)
+
+    def fermer(self):
+        """Rupture de toutes les connexions, définitive
+        """
+        self._fin.set()
+        with self._condition:
+            sockets = list(self._sockets)
+            liens = list(self._liens.values())
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        for lien in liens:
+            self._gm.délier(lien.nom)
+            lien.fermer()
+
+    def _suivre(self, sock):
+        with self._condition:
+            if self._fin.is_set():
+                sock.close()
+                raise OSError("Transport fermé")
+            self._sockets.add(sock)
+
+    def _oublier(self, sock):
+        with self._condition:
+            self._sockets.discard(sock)
+        sock.close()
+
+    def _accepter(self, serveur):
+        while True:
+            try:
+                sock, _ = serveur.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._servir, args=(sock, True),
+                             name="réseau", daemon=True).start()
+
+    def _connecter(self, adresse, période):
+        while not self._fin.is_set():
+            sock = socket.socket(_famille(adresse), socket.SOCK_STREAM)
+            try:
+                sock.connect(adresse)
+            except OSError:
+                sock.close()
+            else:
+                self._servir(sock, False)
+            self._fin.wait(période)
+
+    def _topologie(self):
+        échanges = self._gm._échanges
+        return {
+            "nom": self.nom,
+            "consommés": [n for n, é in échanges.items() if é.consommateurs],
+            "produits": [n for n, é in échanges.items() if é.producteurs],
+        }
+
+    def _servir(self, sock, accepté):
+        """Authentification et échange des topologies, puis réception des
+        données d'une connexion, jusqu'à sa rupture
+        """
+        lien = None
+        try:
+            self._suivre(sock)
+            if sock.family != socket.AF_UNIX:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            flux = sock.makefile("rb")
+            if not _authentifier(sock, flux, self._clé, accepté):
+                return
+            _envoyer(sock, _TOPOLOGIE, pickle.dumps(self._topologie()))
+            genre, données = _recevoir(flux)
+            if genre != _TOPOLOGIE:
+                return
+            lien = self._relier(pickle.loads(données), sock)
+
+            while True:
+                genre, données = _recevoir(flux)
+                if genre == _LOT:
+                    for nom_échange, valeur_codée in pickle.loads(données):
+                        self._gm.recevoir(lien.nom, nom_échange,
+                                          valeur_codée)
+        except (OSError, EOFError):
+            pass
+        finally:
+            if lien is not None:
+                lien.détacher(sock)
+            self._oublier(sock)
+
+    def _relier(self, topologie, sock):
+        nom = "@" + topologie["nom"]
+        with self._condition:
+            ancien = self._liens.get(nom)
+            if ancien is not None \
+                    and ancien.consommés == set(topologie["consommés"]) \
+                    and ancien.produits == set(topologie["produits"]):
+                lien = ancien
+            else:
+                # Nouveau système, ou système redémarré avec d'autres acteurs
+                lien = Lien(nom, topologie["consommés"],
+                            topologie["produits"], self._capacité)
+                self._liens[nom] = lien
+                self._gm.relier(lien)
+            lien.attacher(sock)
+            self._condition.notify_all()
+        if ancien is not None and ancien is not lien:
+            ancien.fermer()
+        return lien
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""Exécution des acteurs par une réserve de tâches de taille fixe.
+
+Plutôt que de dédier une tâche à chaque acteur, seuls les acteurs ayant des
+messages en attente sont confiés, à tour de rôle, aux tâches de la réserve.
+Un acteur n'est jamais traité par deux tâches à la fois : ses points d'entrée
+restent exécutés séquentiellement, comme avec l'ordonnanceur par défaut.
+
+Un point d'entrée inconditionnel qui appelle `time.sleep` immobilise une
+tâche de la réserve le temps de son attente. Écrit comme un générateur (voir
+coton.coopération), il la libère au contraire à chaque attente.
+"""
+
+import inspect
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+import coton
+
+
+class _Acteur:
+    """Contexte d'exécution d'un acteur par la réserve
+    """
+
+    def __init__(self, gm, nom):
+        self.nom = nom
+        self.boîte = gm._files[nom]
+        self.instance = gm.instance(nom)
+        self.routage = gm.routage(nom)
+        self.codecs = {n: gm.codec(n) for n in self.routage}
+        self.entrée = gm.entrée(nom)
+        self.groupé = self.instance._coton_groupé and self.entrée is None
+        self.coopération = None
+        if inspect.isgeneratorfunction(self.entrée):
+            self.coopération = coton.Coopération(gm, nom, self.instance,
+                                                 self.entrée, self.boîte)
+
+    def traiter(self, gm, message):
+        nom_système, valeur_codée = message
+        if nom_système is None and self.coopération is not None:
+            self.coopération.reprendre()
+        elif nom_système is None and valeur_codée is None:
+            début = time.perf_counter_ns()
+            self.entrée(self.instance)
+            gm.vider_sortie(self.nom)
+            if gm._mesures.active:
+                gm._mesures.activation(self.nom, self.entrée.__name__,
+                                       time.perf_counter_ns() - début)
+            self.boîte.put((None, None))
+        else:
+            valeur = self.codecs[nom_système].décoder(valeur_codée)
+            self.routage[nom_système].update(self.instance, valeur)
+            if self.coopération is not None:
+                self.coopération.recevoir(nom_système)
+
+
+class OrdonnanceurRéserve:
+    """Acteurs multiplexés sur un nombre fixe de tâches
+
+    nb_tâches → taille de la réserve, par défaut le nombre de processeurs
+    quota → nombre maximal de messages traités d'affilée pour un même acteur,
+            avant de laisser la place aux autres
+    """
+
+    def __init__(self, nb_tâches=None, quota=16):
+        self._nb_tâches = nb_tâches or os.cpu_count() or 1
+        self._quota = quota
+        self._acteurs = dict()
+        self._prêts = queue.SimpleQueue()
+        self._tâches = list()
+
+    def démarrer(self, gm):
+        for nom in gm._files:
+            self._acteurs[id(gm._files[nom])] = _Acteur(gm, nom)
+
+        for i in range(self._nb_tâches):
+            t = threading.Thread(target=self._travailler, args=(gm,),
+                                 name="réserve-{}".format(i), daemon=True)
+            self._tâches.append(t)
+            t.start()
+
+        for acteur in self._acteurs.values():
+            if acteur.entrée is not None:
+                acteur.boîte.put((None, None))
+            acteur.boîte.planifier(self._prêts.put)
+
+    def _travailler(self, gm):
+        while True:
+            boîte = self._prêts.get()
+            if boîte is None:
+                break
+            acteur = self._acteurs[id(boîte)]
+            # L'exception d'un acteur est signalée sans interrompre la tâche,
+            # qui continue de servir les autres acteurs
+            try:
+                if acteur.groupé:
+                    self._traiter_lot(gm, acteur, boîte)
+                else:
+                    for _ in range(self._quota):
+                        try:
+                            message = boîte.get_nowait()
+                        except queue.Empty:
+                            break
+                        try:
+                            acteur.traiter(gm, message)
+                        finally:
+                            boîte.traité()
+            except Exception:
+                print("ERREUR : exception de l'Acteur {!r}".format(
+                    acteur.nom), file=sys.stderr)
+                traceback.print_exc()
+            finally:
+                boîte.libérer()
+
+    def _traiter_lot(self, gm, acteur, boîte):
+        """Activation groupée des messages en attente, dans la limite du
+        quota
+        """
+        lot = list()
+        for _ in range(self._quota):
+            try:
+                lot.append(boîte.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            if len(lot) == 1:
+                acteur.traiter(gm, lot[0])
+            elif lot:
+                coton.activer_lot(acteur.nom, acteur.instance, acteur.routage,
+                                  acteur.codecs, lot)
+        finally:
+            for _ in lot:
+                boîte.traité()
+
+    def arrêter(self):
+        for _ in self._tâches:
+            self._prêts.put(None)
+
+    def joindre(self, délai=None):
+        for t in self._tâches:
+            if t is not threading.current_thread():
+                t.join(délai)
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""Heure du système, réelle ou simulée.
+
+Les acteurs obtiennent l'heure par `coton.heure()` et attendent par
+`coton.dormir(durée)` plutôt que d'utiliser directement le module `time` :
+le même code peut ainsi s'exécuter en temps réel ou en temps simulé.
+
+Les activations périodiques ou différées (`@entry(every=…)`,
+`@entry(after=…)`) sont toutes produites par un même Minuteur.
+"""
+
+import functools
+import heapq
+import itertools
+import threading
+import time
+
+
+class HorlogeRéelle:
+    """Heure murale
+    """
+
+    virtuelle = False
+
+    def heure(self):
+        return time.time()
+
+    def repère(self):
+        """Heure des échéances (voir Minuteur) : monotone, insensible aux
+        réglages de l'heure murale
+        """
+        return time.monotonic()
+
+    def dormir(self, durée):
+        if durée > 0.0:
+            time.sleep(durée)
+
+    def installer(self, gm):
+        pass
+
+    def arrêter(self):
+        pass
+
+
+class HorlogeVirtuelle:
+    """Heure simulée, avançant par sauts
+
+    L'heure n'avance que lorsque plus aucun acteur n'a de travail : aucun
+    message n'est en attente ni en cours de traitement, hors acteurs
+    endormis. Elle saute alors directement à l'échéance du prochain
+    endormi, qui est réveillé. Les endormis de même échéance sont réveillés
+    un par un, dans l'ordre de leur endormissement. Les actions programmées
+    (voir Minuteur) sont traitées comme des endormis : l'heure n'avance de
+    nouveau qu'une fois l'action exécutée, et le travail qu'elle a produit
+    terminé.
+
+    Seuls les ordonnanceurs à base de tâches ("tâches" et "réserve") la
+    prennent en charge. Un acteur endormi immobilisant sa tâche, une réserve
+    doit compter plus de tâches que d'acteurs susceptibles de dormir en même
+    temps.
+    """
+
+    virtuelle = True
+
+    def __init__(self, origine=0.0):
+        self._heure = origine
+        self._verrou = threading.Lock()
+        self._actifs = 0
+        self._endormis = list()
+        self._numéros = itertools.count()
+        self._arrêtée = False
+
+    def heure(self):
+        return self._heure
+
+    repère = heure
+
+    def dormir(self, durée):
+        réveil = threading.Event()
+        with self._verrou:
+            if self._arrêtée:
+                return
+            heapq.heappush(self._endormis, (self._heure + max(durée, 0.0),
+                                            next(self._numéros), réveil))
+            self._actifs -= 1
+            action = self._avancer()
+        self._exécuter(action)
+        réveil.wait()
+
+    def programmer(self, échéance, action):
+        """Appel de `action` à l'heure donnée
+        """
+        with self._verrou:
+            if not self._arrêtée:
+                heapq.heappush(self._endormis, (échéance, next(self._numéros),
+                                                action))
+
+    def installer(self, gm):
+        """Suivi de l'activité des boîtes d'entrée du système
+        """
+        for boîte in gm._files.values():
+            boîte._horloge = self
+
+    def arrêter(self):
+        """Réveil définitif de tous les endormis, le système s'arrêtant
+        """
+        with self._verrou:
+            self._arrêtée = True
+            for _, _, réveil in self._endormis:
+                if type(réveil) is threading.Event:
+                    réveil.set()
+            self._endormis.clear()
+
+    def occuper(self, nombre=1):
+        """Prise en compte de messages à traiter
+        """
+        with self._verrou:
+            self._actifs += nombre
+
+    def libérer(self):
+        """Fin du traitement d'un message
+        """
+        with self._verrou:
+            self._actifs -= 1
+            action = self._avancer()
+        self._exécuter(action)
+
+    def _avancer(self):
+        """Réveil du prochain endormi si plus personne n'est actif
+
+        Retourne l'action programmée à exécuter, hors verrou, le cas échéant.
+        """
+        if self._actifs == 0 and self._endormis:
+            échéance, _, réveil = heapq.heappop(self._endormis)
+            self._heure = max(self._heure, échéance)
+            self._actifs += 1
+            if type(réveil) is not threading.Event:
+                return réveil
+            réveil.set()
+        return None
+
+    def _exécuter(self, action):
+        while action is not None:
+            action()
+            with self._verrou:
+                self._actifs -= 1
+                action = self._avancer()
+
+
+class Minuteur:
+    """Appels à échéance, périodiques ou non, par une tâche unique
+
+    Les échéances d'un appel périodique sont comptées depuis la première,
+    sans dérive ; celles déjà dépassées (système surchargé) sont sautées.
+
+    En temps réel, les échéances sont comptées sur l'horloge monotone
+    (`repère`), afin qu'un réglage de l'heure murale ne suspende ni ne
+    précipite les appels. En temps simulé, elles sont confiées à l'horloge
+    elle-même.
+    """
+
+    def __init__(self, horloge):
+        self._horloge = horloge
+        self._échéances = list()
+        self._numéros = itertools.count()
+        self._condition = threading.Condition()
+        self._fin = False
+        self._tâche = None
+
+    def programmer(self, action, délai, période=None):
+        """Appel de `action` dans `délai` secondes, puis toutes les `période`
+        secondes s'il y a lieu
+        """
+        échéance = self._horloge.repère() + max(délai, 0.0)
+        if self._horloge.virtuelle:
+            self._horloge.programmer(échéance, functools.partial(
+                self._échoir, échéance, action, période))
+            return
+        with self._condition:
+            if self._fin:
+                return
+            heapq.heappush(self._échéances, (échéance, next(self._numéros),
+                                             action, période))
+            if self._tâche is None:
+                self._tâche = threading.Thread(target=self._minuter,
+                                               name="minuteur", daemon=True)
+                self._tâche.start()
+            else:
+                self._condition.notify()
+
+    def démarrer(self):
+        """Prise en compte des échéances programmées avant le démarrage
+        """
+        if self._horloge.virtuelle:
+            # Sans acteur actif, l'heure n'avancerait jamais jusqu'à elles
+            self._horloge.occuper()
+            self._horloge.libérer()
+
+    def arrêter(self):
+        with self._condition:
+            self._fin = True
+            self._condition.notify()
+
+    def joindre(self, délai=None):
+        if self._tâche is not None \
+                and self._tâche is not threading.current_thread():
+            self._tâche.join(délai)
+
+    def _échoir(self, échéance, action, période):
+        """Appel d'une action en temps simulé
+        """
+        if self._fin:
+            return
+        if période is not None:
+            self._horloge.programmer(échéance + période, functools.partial(
+                self._échoir, échéance + période, action, période))
+        action()
+
+    def _minuter(self):
+        horloge = self._horloge
+        échéances = self._échéances
+        while True:
+            with self._condition:
+                if self._fin:
+                    return
+                if not échéances:
+                    self._condition.wait()
+                    continue
+                échéance, _, action, période = échéances[0]
+                reste = échéance - horloge.repère()
+                if reste > 0.0:
+                    self._condition.wait(reste)
+                    continue
+                if période is None:
+                    heapq.heappop(échéances)
+                else:
+                    heapq.heapreplace(échéances, (
+                        échéance + période * (1 + -reste // période),
+                        next(self._numéros), action, période))
+
+            # Hors verrou, l'action pouvant elle-même programmer des appels
+            action()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""Traces du fonctionnement du système.
+
+Désactivée, une trace ne coûte qu'une comparaison d'entiers au point
+d'émission. Activée, elle est mémorisée brute (horodatage, format et
+arguments) dans un puits, la mise en forme et l'écriture étant reportées hors
+des tâches des acteurs.
+"""
+
+import collections
+import sys
+import threading
+import time
+
+
+AUCUN = 0
+ERREUR = 1
+AVERTISSEMENT = 2
+INFO = 3
+DÉTAIL = 4
+
+_NOMS = {ERREUR: "ERREUR", AVERTISSEMENT: "AVERTISSEMENT", INFO: "INFO",
+         DÉTAIL: "DÉTAIL"}
+
+
+Enregistrement = collections.namedtuple(
+    "Enregistrement", ["heure", "niveau", "format", "args"])
+
+
+def mettre_en_forme(enregistrement):
+    """Représentation textuelle d'un enregistrement
+    """
+    return "{:.6f} {}: {}\n".format(
+        enregistrement.heure, _NOMS.get(enregistrement.niveau, "?"),
+        enregistrement.format.format(*enregistrement.args))
+
+
+class Traceur:
+    """Point d'émission des traces
+
+    Le niveau est un attribut public afin que les points d'émission
+    sensibles puissent le tester avant même d'appeler `tracer` :
+
+      if traceur.niveau >= DÉTAIL:
+          traceur.tracer(DÉTAIL, "{} → {}", a, b)
+    """
+
+    def __init__(self):
+        self.niveau = AUCUN
+        self._puits = None
+
+    def configurer(self, niveau, puits=None):
+        """Choix du niveau de trace et de sa destination
+
+        En l'absence de puits, les traces sont écrites sur la sortie standard
+        par une tâche dédiée.
+        """
+        if niveau > AUCUN and puits is None:
+            puits = self._puits or PuitsFlux()
+        # Un point d'émission ne doit jamais voir un niveau actif avec un
+        # puits absent ou fermé : le niveau est abaissé avant le changement
+        # de puits, et relevé après
+        if niveau < self.niveau:
+            self.niveau = niveau
+        ancien, self._puits = self._puits, puits
+        self.niveau = niveau
+        if ancien is not None and ancien is not puits:
+            ancien.fermer()
+
+    @property
+    def puits(self):
+        return self._puits
+
+    def tracer(self, niveau, format, *args):
+        if niveau <= self.niveau:
+            self._puits.ajouter(
+                Enregistrement(time.time(), niveau, format, args))
+
+
+class PuitsFlux:
+    """Écriture différée et groupée des traces dans un flux
+
+    Les enregistrements sont accumulés sans verrou, puis mis en forme et
+    écrits par paquets par une tâche de fond.
+    """
+
+    def __init__(self, flux=None, période=0.1):
+        self._flux = flux
+        self._période = période
+        self._attente = collections.deque()
+        self._fin = threading.Event()
+        self._verrou = threading.Lock()
+        self._tâche = threading.Thread(target=self._écrire, name="trace",
+                                       daemon=True)
+        self._tâche.start()
+
+    def ajouter(self, enregistrement):
+        self._attente.append(enregistrement)
+
+    def vider(self):
+        """Écriture immédiate de toutes les traces en attente
+        """
+        with self._verrou:
+            lignes = list()
+            try:
+                while True:
+                    lignes.append(mettre_en_forme(self._attente.popleft()))
+            except IndexError:
+                pass
+            if lignes:
+                flux = self._flux or sys.stdout
+                flux.write("".join(lignes))
+                flux.flush()
+
+    def fermer(self):
+        self._fin.set()
+        self._tâche.join()
+        self.vider()
+
+    def _écrire(self):
+        while not self._fin.wait(self._période):
+            self.vider()
+
+
+class PuitsAnneau:
+    """Conservation en mémoire des dernières traces seulement
+
+    Rien n'est écrit tant que `vider` n'est pas explicitement appelé, par
+    exemple suite à la détection d'une anomalie.
+    """
+
+    def __init__(self, capacité=65536):
+        self._anneau = collections.deque(maxlen=capacité)
+
+    def ajouter(self, enregistrement):
+        self._anneau.append(enregistrement)
+
+    def __len__(self):
+        return len(self._anneau)
+
+    def __iter__(self):
+        yield from list(self._anneau)
+
+    def vider(self, flux=None):
+        """Écriture, puis oubli, des traces conservées
+        """
+        flux = flux or sys.stdout
+        enregistrements = list()
+        try:
+            while True:
+                enregistrements.append(self._anneau.popleft())
+        except IndexError:
+            pass
+        flux.write("".join(mettre_en_forme(e) for e in enregistrements))
+        flux.flush()
+
+    def fermer(self):
+        pass
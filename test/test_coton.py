@@ -1,9 +1,22 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import time
 import unittest
 
+import coton
 from coton import FileSortie
+from coton.processus import OrdonnanceurProcessus
+from coton.réseau import Transport
+from coton.réserve import OrdonnanceurRéserve
 
 
 class TestFileSortie(unittest.TestCase):
@@ -26,6 +39,1263 @@ class TestFileSortie(unittest.TestCase):
         f.push("toto", "15", True)
         self.assertEqual(len(f), 3)
 
+    def test_coalescence(self):
+        f = FileSortie()
+        f.push("a", 1, False)
+        f.push("b", 1, False)
+        f.push("c", 1, False)
+        f.push("x", 1, True)
+        f.push("a", 2, False)
+        f.push("b", 2, False)
+        f.push("x", 2, True)
+        f.push("a", 3, False)
+        self.assertEqual([(d.name, d.value) for d in f],
+                         [("c", 1), ("x", 1), ("b", 2), ("x", 2), ("a", 3)])
+        self.assertEqual(f[-1].value, 3)
+        f.clear()
+        self.assertEqual(len(f), 0)
+
+
+class TestBoîte(unittest.TestCase):
+
+    def test_écarter(self):
+        b = coton.BoîteBornée(2, coton.ÉCARTER)
+        for i in range(4):
+            b.put(("x", i))
+        self.assertEqual(b.qsize(), 2)
+        self.assertEqual([b.get(), b.get()], [("x", 2), ("x", 3)])
+
+    def test_fusionner(self):
+        b = coton.BoîteBornée()
+        b.limiter(1, coton.FUSIONNER, "x")
+        b.put(("x", 0))
+        b.put(("y", 0))
+        b.put(("x", 1))
+        b.put(("x", 2))
+        self.assertEqual([b.get(), b.get()], [("x", 2), ("y", 0)])
+        self.assertEqual(b.qsize(), 0)
+
+    def test_bloquer(self):
+        b = coton.BoîteBornée(1, coton.BLOQUER)
+        b.put(("x", 0))
+        t = threading.Thread(target=b.put, args=(("x", 1),))
+        t.start()
+        t.join(0.05)
+        self.assertTrue(t.is_alive())
+        self.assertEqual(b.get(), ("x", 0))
+        t.join(1.0)
+        self.assertEqual(b.get(), ("x", 1))
+
+    def test_priorités(self):
+        b = coton.Boîte()
+        for i in range(3):
+            b.put(("mesure", i))
+        b.prioriser({"cible": 1}, patience=2)
+        for i in range(4):
+            b.put(("cible", i))
+        self.assertEqual([b.get() for _ in range(7)], [
+            ("cible", 0), ("cible", 1), ("mesure", 0), ("cible", 2),
+            ("cible", 3), ("mesure", 1), ("mesure", 2)])
+
+    def test_priorités_bornée(self):
+        b = coton.BoîteBornée(2, coton.ÉCARTER)
+        b.prioriser({"cible": 1})
+        b.put(("cible", 0))
+        b.put(("mesure", 0))
+        b.put(("cible", 1))
+        self.assertEqual([b.get(), b.get()], [("cible", 0), ("cible", 1)])
+
+    def test_priorité_déclarée(self):
+        coton.réinitialiser()
+
+        class Gestionnaire(metaclass=coton.MétaActeur):
+            cible = coton.recv_msg("Cible", priority=2)
+            mesure = coton.recv_msg("Mesure")
+
+            @coton.entry(cible, mesure)
+            def gérer(self):
+                pass
+
+        class Antenne(metaclass=coton.MétaActeur):
+            mesure = coton.send_msg("Mesure", priority=1)
+
+        boîte = coton.GM._files["Gestionnaire"]
+        for nom in ("mesure", "cible", "mesure"):
+            boîte.put((nom, None))
+        self.assertEqual([boîte.get()[0] for _ in range(3)],
+                         ["cible", "mesure", "mesure"])
+        coton.réinitialiser()
+
+    def test_lot(self):
+        b = coton.Boîte()
+        réveils = list()
+        b.planifier(réveils.append)
+        b.libérer()
+        b.put_lot([("x", 0), ("y", 1)])
+        b.put(("x", 2))
+        self.assertEqual(len(réveils), 1)
+        b.put(coton._ARRÊT)
+        b.put(("x", 3))
+        self.assertEqual(b.get_lot(),
+                         [("x", 0), ("y", 1), ("x", 2), coton._ARRÊT])
+        self.assertEqual(b.get_lot(), [("x", 3)])
+
+    def test_lot_sorties(self):
+        coton.réinitialiser()
+
+        class Source(metaclass=coton.MétaActeur):
+            a = coton.send_msg("A")
+            b = coton.send_msg("B")
+
+            @coton.entry
+            def produire(self):
+                self.a = 1
+                self.b = 2
+                self.a = 3
+
+        class Puits(metaclass=coton.MétaActeur):
+            a = coton.recv_msg("A")
+            b = coton.recv_msg("B")
+
+        coton.GM._instances["Source"] = source = Source()
+        lots = list()
+        coton.GM._files["Puits"].put_lot = lots.append
+        source.produire()
+        coton.GM.vider_sortie("Source")
+        self.assertEqual([[(n, coton.GM.codec(n).décoder(v)) for n, v in lot]
+                          for lot in lots], [[("b", 2), ("a", 3)]])
+        coton.réinitialiser()
+
+    def test_limite_échange(self):
+        coton.réinitialiser()
+
+        class Lent(metaclass=coton.MétaActeur):
+            valeur = coton.recv_msg("Valeur", capacity=1,
+                                    policy=coton.FUSIONNER)
+
+            @coton.entry(valeur)
+            def lire(self):
+                pass
+
+        boîte = coton.GM._files["Lent"]
+        for i in range(10):
+            coton.GM.transmettre("Rapide", "valeur", i)
+        self.assertEqual(boîte.qsize(), 1)
+        self.assertEqual(boîte.get(), ("valeur", 9))
+        coton.réinitialiser()
+
+
+class TestRoutage(unittest.TestCase):
+
+    def test_nom_système(self):
+        class Routé(metaclass=coton.MétaActeur):
+            entrée = coton.recv_msg("Donnée reçue", system_name="donnée")
+            sortie = coton.send_msg("Donnée produite", system_name="résultat")
+
+            @coton.entry(entrée)
+            def activer(self):
+                pass
+
+        routage = coton.GM.routage("Routé")
+        self.assertIs(routage["donnée"], Routé.__dict__["entrée"])
+        self.assertIs(routage["résultat"], Routé.__dict__["sortie"])
+        self.assertNotIn("entrée", routage)
+        self.assertIn("Routé", coton.GM._échanges["donnée"].consommateurs)
+        self.assertIn("Routé", coton.GM._échanges["résultat"].producteurs)
+
+
+class TestActivation(unittest.TestCase):
+
+    def setUp(self):
+        coton.réinitialiser()
+
+    def tearDown(self):
+        coton.réinitialiser()
+
+    def déclarer(self, groupé):
+        class Filtre(metaclass=coton.MétaActeur, grouped=groupé):
+            mesure = coton.recv_msg("Mesure")
+            seuil = coton.recv_msg("Seuil", 0)
+            alarme = coton.send_msg("Alarme", 0)
+
+            @coton.entry(mesure)
+            def compter(self):
+                self.alarme += 1
+
+            @coton.entry(mesure, seuil)
+            def comparer(self):
+                self.alarme += 10
+
+        class Sirène(metaclass=coton.MétaActeur):
+            alarme = coton.recv_msg("Alarme")
+
+            @coton.entry(alarme)
+            def sonner(self):
+                pass
+
+        return Filtre()
+
+    def reçus(self):
+        boîte = coton.GM._files["Sirène"]
+        return [boîte.get()[1] for _ in range(boîte.qsize())]
+
+    def test_séparée(self):
+        filtre = self.déclarer(False)
+        type(filtre).__dict__["mesure"].update(filtre, 1)
+        self.assertEqual(self.reçus(), [1, 11])
+
+    def test_groupée(self):
+        filtre = self.déclarer(True)
+        type(filtre).__dict__["mesure"].update(filtre, 1)
+        self.assertEqual(self.reçus(), [11])
+
+    def test_groupée_lot(self):
+        filtre = self.déclarer(True)
+        routage = coton.GM.routage("Filtre")
+        codecs = {n: coton.GM.codec(n) for n in routage}
+        messages = [("mesure", 1), ("seuil", 5), ("mesure", 2)]
+        coton.activer_lot("Filtre", filtre, routage, codecs, messages)
+        self.assertEqual((filtre.mesure, filtre.seuil), (2, 5))
+        self.assertEqual(self.reçus(), [11])
+
+
+class TestCadence(unittest.TestCase):
+
+    def setUp(self):
+        coton.réinitialiser()
+
+        class Affichage(metaclass=coton.MétaActeur):
+            position = coton.recv_msg("Position", rate=20)
+            vitesse = coton.recv_msg("Vitesse", every=3)
+
+            @coton.entry(position, vitesse)
+            def afficher(self):
+                pass
+
+        self.boîte = coton.GM._files["Affichage"]
+
+    def tearDown(self):
+        coton.GM.purger()
+        coton.réinitialiser()
+
+    def reçus(self):
+        messages = list()
+        while self.boîte.qsize():
+            nom, valeur_codée = self.boîte.get()
+            messages.append(coton.GM.codec(nom).décoder(valeur_codée))
+        return messages
+
+    def test_pas(self):
+        for i in range(9):
+            coton.GM.transmettre("Pisteur", "vitesse", i)
+        self.assertEqual(self.reçus(), [0, 3, 6])
+
+    def test_rythme(self):
+        for i in range(10):
+            coton.GM.transmettre("Pisteur", "position", i)
+        self.assertEqual(self.reçus(), [0])
+        time.sleep(0.2)
+        self.assertEqual(self.reçus(), [9])
+        coton.GM.transmettre("Pisteur", "position", 10)
+        coton.GM.transmettre("Pisteur", "position", 11)
+        self.assertEqual(self.reçus(), [10])
+        time.sleep(0.2)
+        self.assertEqual(self.reçus(), [11])
+
+    def test_mesures(self):
+        for i in range(10):
+            coton.GM.transmettre("Pisteur", "position", i)
+        time.sleep(0.2)
+        self.assertEqual(self.reçus(), [0, 9])
+        self.assertEqual(
+            coton.mesures()["échanges"]["position"]["livraisons"], 2)
+
+    def test_isolation(self):
+        valeur = [0]
+        coton.GM.transmettre("Pisteur", "position", valeur)
+        valeur.append(1)
+        coton.GM.transmettre("Pisteur", "position", valeur)
+        valeur.append(2)
+        time.sleep(0.2)
+        self.assertEqual(self.reçus(), [[0], [0, 1]])
+
+    def test_horloge_virtuelle(self):
+        coton.réinitialiser()
+        coton.définir_horloge(coton.HorlogeVirtuelle())
+        reçus = list()
+
+        class Pisteur(metaclass=coton.MétaActeur):
+            position = coton.send_msg("Position", 0)
+
+            @coton.entry(every=1.5)
+            def pister(self):
+                self.position += 1
+                if self.position == 150:
+                    coton.arrêter()
+
+        class Affichage(metaclass=coton.MétaActeur):
+            position = coton.recv_msg("Position", 0, rate=0.01)
+
+            @coton.entry(position)
+            def afficher(self):
+                reçus.append((self.position, coton.heure()))
+
+        t0 = time.monotonic()
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertLess(time.monotonic() - t0, 5.0)
+        self.assertEqual(reçus, [(1, 1.5), (67, 101.5), (134, 201.5)])
+
+
+class TestFiltre(unittest.TestCase):
+
+    def test_filtres(self):
+        coton.réinitialiser()
+
+        class Gestionnaire(metaclass=coton.MétaActeur):
+            cible = coton.recv_msg("Cible", filter=lambda c: c is not None)
+
+            @coton.entry(cible)
+            def gérer(self):
+                pass
+
+        class Alarme(metaclass=coton.MétaActeur):
+            cible = coton.recv_msg("Cible", filter={"genre": "missile"})
+
+            @coton.entry(cible)
+            def alerter(self):
+                pass
+
+        cibles = [None, {"genre": "avion"}, {"genre": "missile"}, None, 3]
+        encodées = list()
+        codec = coton.GM.codec("cible")
+        encoder_pour = codec.encoder_pour
+        codec.encoder_pour = lambda v, n: encodées.append((v, n)) \
+            or encoder_pour(v, n)
+        try:
+            for cible in cibles:
+                coton.GM.transmettre("Pisteur", "cible", cible)
+        finally:
+            del codec.encoder_pour
+
+        self.assertEqual(encodées, [({"genre": "avion"}, 1),
+                                    ({"genre": "missile"}, 2), (3, 1)])
+        for nom, attendues in (("Gestionnaire", cibles[1:3] + [3]),
+                               ("Alarme", [{"genre": "missile"}])):
+            boîte = coton.GM._files[nom]
+            self.assertEqual([codec.décoder(boîte.get()[1])
+                              for _ in range(boîte.qsize())], attendues)
+        coton.réinitialiser()
+
+
+class TestTopologie(unittest.TestCase):
+
+    def setUp(self):
+        coton.réinitialiser()
+
+    def tearDown(self):
+        coton.réinitialiser()
+
+    def test_compiler(self):
+        codages = list()
+
+        class CodecCompté(coton.CodecDirect):
+            def encoder(self, valeur):
+                codages.append(valeur)
+                return valeur
+
+        class Source(metaclass=coton.MétaActeur):
+            mesure = coton.send_msg("Mesure", codec=CodecCompté())
+            journal = coton.send_msg("Journal", codec=CodecCompté())
+
+        class Capteur(metaclass=coton.MétaActeur):
+            mesure = coton.recv_msg("Mesure")
+            commande = coton.recv_msg("Commande")
+
+            @coton.entry(mesure)
+            def lire(self):
+                pass
+
+        self.assertEqual(coton.GM.compiler(), [
+            "l'échange 'commande' n'a aucun producteur (consommé par"
+            " Capteur)",
+            "l'échange 'journal' n'a aucun consommateur (produit par"
+            " Source)"])
+        coton.GM.transmettre("Source", "journal", 1)
+        coton.GM.transmettre("Source", "mesure", 2)
+        self.assertEqual(codages, [2])
+        self.assertEqual(coton.GM._files["Capteur"].qsize(), 1)
+
+        graphe = coton.graphe()
+        self.assertIn('"Source" -> "Capteur" [label="mesure"];', graphe)
+        self.assertIn('"Source" -> "échange journal"', graphe)
+        self.assertIn('"échange commande" -> "Capteur"', graphe)
+
+    def test_partage(self):
+        class Perturbateur(metaclass=coton.MétaActeur):
+            partage = coton.send_msg("Partage")
+
+        class Témoin(metaclass=coton.MétaActeur):
+            partage = coton.send_msg("Partage")
+
+        class Compteur(metaclass=coton.MétaActeur):
+            compte = coton.send_msg("Compte")
+
+        self.assertEqual(coton.GM.compiler(), [
+            "l'échange 'compte' n'a aucun consommateur (produit par"
+            " Compteur)"])
+        graphe = coton.graphe()
+        self.assertIn('"Perturbateur" -> "Témoin" [label="partage"];', graphe)
+        self.assertIn('"Témoin" -> "Perturbateur" [label="partage"];', graphe)
+        self.assertNotIn('"échange partage"', graphe)
+
+        coton.répliquer(Compteur, 2)
+        self.assertEqual(coton.GM.compiler(), [])
+        self.assertIn('"Compteur" -> "Compteur" [label="compte"];',
+                      coton.graphe())
+
+
+class TestRépliques(unittest.TestCase):
+
+    def setUp(self):
+        coton.réinitialiser()
+
+    def tearDown(self):
+        coton.réinitialiser()
+
+    def déclarer(self, répartition):
+        class Capteur(metaclass=coton.MétaActeur):
+            mesure = coton.recv_msg("Mesure", routing=répartition)
+
+            @coton.entry(mesure)
+            def lire(self):
+                pass
+
+        coton.répliquer(Capteur, 3)
+        return coton.GM.répliques("Capteur")
+
+    def reçus(self, noms):
+        retour = list()
+        codec = coton.GM.codec("mesure")
+        for nom in noms:
+            boîte = coton.GM._files[nom]
+            retour.append([codec.décoder(boîte.get()[1])
+                           for _ in range(boîte.qsize())])
+        return retour
+
+    def test_diffusion(self):
+        noms = self.déclarer(coton.DIFFUSION)
+        self.assertEqual(noms, ["Capteur#0", "Capteur#1", "Capteur#2"])
+        coton.GM.transmettre("Source", "mesure", 1)
+        self.assertEqual(self.reçus(noms), [[1], [1], [1]])
+
+    def test_tourniquet(self):
+        noms = self.déclarer(coton.TOURNIQUET)
+        for i in range(6):
+            coton.GM.transmettre("Source", "mesure", i)
+        self.assertEqual(self.reçus(noms), [[0, 3], [1, 4], [2, 5]])
+
+    def test_partition(self):
+        noms = self.déclarer(coton.Partition("antenne"))
+        for i in range(9):
+            coton.GM.transmettre("Source", "mesure", {"antenne": i % 3})
+        for valeurs in self.reçus(noms):
+            self.assertEqual(len({v["antenne"] for v in valeurs}),
+                             1 if valeurs else 0)
+
+    def test_instances(self):
+        noms = self.déclarer(coton.DIFFUSION)
+        coton.GM.démarrer()
+        for nom in noms:
+            self.assertEqual(coton.GM.instance(nom)._coton_nom, nom)
+        coton.arrêter()
+        self.assertTrue(coton.GM.attendre(1.0))
+
+
+class TestCodage(unittest.TestCase):
+
+    def test_isolation(self):
+        valeur = {"liste": [1, 2]}
+        for codec in (coton.CodecPickle(), coton.CodecCopie(),
+                      coton.CodecPickle(5, hors_bande=True)):
+            reçue = codec.décoder(codec.encoder(valeur))
+            self.assertEqual(reçue, valeur)
+            self.assertIsNot(reçue["liste"], valeur["liste"])
+
+    def test_hors_bande(self):
+        codec = coton.CodecPickle(5, hors_bande=True)
+        tampon = bytearray(b"0123456789")
+        valeur_codée = codec.encoder(pickle.PickleBuffer(tampon))
+        tampon[0] = ord("X")
+        self.assertEqual(bytes(codec.décoder(valeur_codée)), b"0123456789")
+
+    def test_scalaires(self):
+        codec = coton.CodecPickle()
+        for valeur in (None, 12, 1.5, "tic"):
+            self.assertIs(codec.encoder(valeur), valeur)
+        self.assertEqual(codec.décoder(codec.encoder(b"tic")), b"tic")
+
+    def test_partagé(self):
+        codec = coton.CodecPartagé()
+        tampon = bytearray(b"0123456789")
+        segment = codec.encoder_pour(tampon, 2)
+        tampon[0] = ord("X")
+        vues = [codec.décoder(segment), codec.décoder(segment)]
+        for vue in vues:
+            self.assertEqual(bytes(vue), b"0123456789")
+            self.assertTrue(vue.données.readonly)
+        vues[0].libérer()
+        with vues[1]:
+            self.assertEqual(vues[1][1], ord("1"))
+        with self.assertRaises(FileNotFoundError):
+            codec.décoder(segment)
+
+    def test_partagé_processus(self):
+        coton.réinitialiser()
+        reçus = multiprocessing.get_context("fork").Queue()
+
+        class Caméra(metaclass=coton.MétaActeur):
+            image = coton.send_msg("Image", immediate=True,
+                                   codec=coton.CodecPartagé())
+
+            @coton.entry
+            def prendre(self):
+                self.image = bytes(range(256)) * 4096
+                coton.dormir(0.01)
+
+        class Écran(metaclass=coton.MétaActeur):
+            image = coton.recv_msg("Image")
+
+            @coton.entry(image)
+            def afficher(self):
+                reçus.put((len(self.image), self.image[1024 * 1024 - 1]))
+                coton.arrêter()
+
+        coton.GM.démarrer(OrdonnanceurProcessus([Écran]))
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(reçus.get(timeout=1.0), (1024 * 1024, 255))
+        coton.réinitialiser()
+
+    def test_direct(self):
+        valeur = (1, "deux")
+        codec = coton.CodecDirect()
+        self.assertIs(codec.décoder(codec.encoder(valeur)), valeur)
+
+    def test_immuable(self):
+        @coton.figé
+        class Piste:
+            numéro: int
+            positions: tuple
+
+        for valeur in (None, b"x", (1, ("a", 2.0)), frozenset([1]),
+                       Piste(1, ((0, 0), (1, 1)))):
+            self.assertTrue(coton.immuable(valeur))
+        for valeur in ([1], (1, [2]), Piste(1, [(0, 0)]), bytearray(b"x")):
+            self.assertFalse(coton.immuable(valeur))
+
+    def test_échange_immuable(self):
+        coton.réinitialiser()
+
+        class Pisteur(metaclass=coton.MétaActeur):
+            pistes = coton.send_msg("Pistes", immediate=True, immutable=True)
+
+        class Carte(metaclass=coton.MétaActeur):
+            pistes = coton.recv_msg("Pistes")
+
+        pisteur = Pisteur()
+        coton.GM._instances["Pisteur"] = pisteur
+        pistes = ((1, 2.0), (2, 3.0))
+        pisteur.pistes = pistes
+        nom, valeur_codée = coton.GM._files["Carte"].get()
+        self.assertIs(coton.GM.codec(nom).décoder(valeur_codée), pistes)
+        with self.assertRaises(TypeError):
+            pisteur.pistes = [(1, 2.0)]
+        coton.réinitialiser()
+
+    def test_publier(self):
+        coton.réinitialiser()
+
+        class Pisteur(metaclass=coton.MétaActeur):
+            pistes = coton.send_msg(system_name="Pistes", immutable=True)
+
+        class Carte(metaclass=coton.MétaActeur):
+            pistes = coton.recv_msg(system_name="Pistes")
+
+        pisteur = Pisteur()
+        coton.GM._instances["Pisteur"] = pisteur
+        pisteur._pistes = (1, 2)
+        coton.publier(pisteur, Pisteur.pistes)
+        coton.GM.vider_sortie("Pisteur")
+        nom, valeur_codée = coton.GM._files["Carte"].get()
+        self.assertEqual(coton.GM.codec(nom).décoder(valeur_codée), (1, 2))
+        pisteur._pistes = [1, 2]
+        with self.assertRaises(TypeError):
+            coton.publier(pisteur, Pisteur.pistes)
+        coton.réinitialiser()
+
+    def test_producteurs_immuables(self):
+        coton.réinitialiser()
+
+        class Simulateur(metaclass=coton.MétaActeur):
+            pistes = coton.send_msg("Pistes", immediate=True)
+
+        class Pisteur(metaclass=coton.MétaActeur):
+            pistes = coton.send_msg("Pistes", immediate=True, immutable=True)
+
+        class Carte(metaclass=coton.MétaActeur):
+            pistes = coton.recv_msg("Pistes")
+
+        simulateur = Simulateur()
+        coton.GM._instances["Simulateur"] = simulateur
+        with self.assertRaises(TypeError):
+            simulateur.pistes = [(1, 2.0)]
+        coton.réinitialiser()
+
+
+class TestDifférentiel(unittest.TestCase):
+
+    def setUp(self):
+        coton.réinitialiser()
+
+        class Source(metaclass=coton.MétaActeur):
+            liste = coton.send_msg("Liste", delta=3)
+            table = coton.send_msg("Table", delta=True)
+
+        class Puits(metaclass=coton.MétaActeur):
+            liste = coton.recv_msg("Liste")
+            table = coton.recv_msg("Table")
+
+        self.puits = Puits()
+
+    def tearDown(self):
+        coton.réinitialiser()
+
+    def transmettre(self, nom_échange, valeur, producteur="Source"):
+        """Transmission d'une valeur, retournant la différence reçue
+        """
+        coton.GM.transmettre(producteur, nom_échange, valeur)
+        nom, valeur_codée = coton.GM._files["Puits"].get()
+        différence = coton.GM.codec(nom).décoder(valeur_codée)
+        type(self.puits).__dict__[nom].update(self.puits, différence)
+        return différence
+
+    def test_liste(self):
+        valeur = [1, 2]
+        genres = list()
+        for i in range(5):
+            genres.append(self.transmettre("liste", valeur).genre)
+            self.assertEqual(self.puits.liste, valeur)
+            valeur.append(i)
+        genres.append(self.transmettre("liste", valeur[:2]).genre)
+        self.assertEqual(self.puits.liste, [1, 2])
+        self.assertEqual(genres, ["image", "étendre", "étendre", "étendre",
+                                  "image", "tronquer"])
+
+    def test_dict(self):
+        valeur = {k: (k,) for k in range(10)}
+        self.transmettre("table", valeur)
+        valeur = dict(valeur)
+        valeur[0] = ("zéro",)
+        del valeur[9]
+        différence = self.transmettre("table", valeur)
+        self.assertEqual(différence.contenu, ({0: ("zéro",)}, [9]))
+        self.assertEqual(self.puits.table, valeur)
+
+    def test_producteurs(self):
+        class Source2(metaclass=coton.MétaActeur):
+            liste = coton.send_msg("Liste", delta=3)
+
+        valeurs = {"Source": [1], "Source2": [10]}
+        genres = list()
+        for i in range(4):
+            for producteur, valeur in valeurs.items():
+                valeur.append(i)
+                genres.append(self.transmettre("liste", valeur,
+                                               producteur).genre)
+                self.assertEqual(self.puits.liste, valeur)
+        self.assertEqual(genres, ["image"] * 2 + ["étendre"] * 6)
+
+    def test_muable(self):
+        valeur = {k: (k,) for k in range(10)}
+        self.transmettre("table", valeur)
+        with self.assertRaises(TypeError):
+            coton.GM.transmettre("Source", "table", dict(valeur, a=["a"]))
+        self.assertEqual(self.transmettre("table", dict(valeur, a=("a",)))
+                         .contenu, ({"a": ("a",)}, []))
+        with self.assertRaises(TypeError):
+            coton.GM.transmettre("Source", "liste", [[1]])
+
+    def test_filtré(self):
+        class Sélectif(metaclass=coton.MétaActeur):
+            liste = coton.recv_msg("Liste", filter=lambda l: len(l) % 2 == 0)
+
+        sélectif = Sélectif()
+        valeur = list()
+        for i in range(6):
+            valeur.append(i)
+            coton.GM.transmettre("Source", "liste", list(valeur))
+        boîte = coton.GM._files["Sélectif"]
+        self.assertEqual(boîte.qsize(), 3)
+        for _ in range(3):
+            nom, valeur_codée = boîte.get()
+            type(sélectif).__dict__[nom].update(
+                sélectif, coton.GM.codec(nom).décoder(valeur_codée))
+            self.assertEqual(len(sélectif.liste) % 2, 0)
+        self.assertEqual(sélectif.liste, valeur)
+        genres = [coton.GM.codec(n).décoder(v).genre
+                  for n, v in (coton.GM._files["Puits"].get()
+                               for _ in range(6))]
+        self.assertEqual(genres, ["image"] + ["étendre"] * 3 + ["image",
+                                                              "étendre"])
+
+    def test_resynchronisation(self):
+        valeur = [1]
+        self.transmettre("liste", valeur)
+        coton.GM.transmettre("Source", "liste", valeur + [2])
+        coton.GM._files["Puits"].get()
+        self.assertEqual(self.transmettre("liste", valeur + [2, 3]).genre,
+                         "étendre")
+        self.assertEqual(self.puits.liste, [1])
+        self.assertEqual(self.transmettre("liste", valeur + [2, 3]).genre,
+                         "image")
+        self.assertEqual(self.puits.liste, [1, 2, 3])
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.chemin = tempfile.mkstemp(suffix=".journal")
+        os.close(fd)
+
+    def tearDown(self):
+        coton.réinitialiser()
+        os.remove(self.chemin)
+
+    def test_enregistrer_rejouer(self):
+        système_compteur(50)
+        coton.enregistrer(self.chemin)
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        coton.enregistrer(None)
+
+        with coton.journal.Journal(self.chemin) as journal:
+            enregistrements = list(journal)
+        self.assertEqual(
+            [coton.journal.valeur(e) for e in enregistrements[:50]],
+            list(range(1, 51)))
+        self.assertEqual({(e.producteur, e.échange) for e in enregistrements},
+                         {("Compteur", "valeur")})
+
+        système_compteur(50)
+        nombre = coton.journal.rejouer(self.chemin, ["Lecteur"],
+                                       rythme=False)
+        self.assertEqual(nombre, len(enregistrements))
+        boîte = coton.GM._files["Lecteur"]
+        codec = coton.GM.codec("valeur")
+        self.assertEqual([codec.décoder(boîte.get()[1]) for _ in range(50)],
+                         list(range(1, 51)))
+
+    def test_tronqué(self):
+        enregistreur = coton.journal.Enregistreur(self.chemin)
+        for i in range(3):
+            enregistreur.enregistrer(float(i), "A", "x", coton.CodecPickle(),
+                                     i, pickle.dumps(i))
+        enregistreur.fermer()
+        with open(self.chemin, "r+b") as f:
+            f.truncate(os.path.getsize(self.chemin) - 1)
+        with coton.journal.Journal(self.chemin) as journal:
+            self.assertEqual([e.heure for e in journal], [0.0, 1.0])
+
+
+def nœud_lecteur(adresse, cible, reçus):
+    """Système distant, consommateur d'un compteur
+    """
+    coton.réinitialiser()
+
+    class Lecteur(metaclass=coton.MétaActeur):
+        valeur = coton.recv_msg("Compteur", 0)
+
+        @coton.entry(valeur)
+        def lire(self):
+            reçus.put(self.valeur)
+            if self.valeur == cible:
+                coton.arrêter()
+
+    transport = Transport("lecteur")
+    transport.connecter(adresse, période=0.05)
+    coton.GM.démarrer()
+    coton.GM.attendre(10.0)
+    transport.fermer()
+
+
+class TestRéseau(unittest.TestCase):
+
+    def tearDown(self):
+        coton.réinitialiser()
+
+    def test_boucle_locale(self):
+        coton.réinitialiser()
+        contexte = multiprocessing.get_context("fork")
+        reçus = contexte.Queue()
+
+        class Compteur(metaclass=coton.MétaActeur):
+            valeur = coton.send_msg("Compteur", 0)
+
+            @coton.entry
+            def compter(self):
+                if self.valeur < 100:
+                    self.valeur += 1
+                else:
+                    coton.dormir(0.01)
+
+        transport = Transport("compteur")
+        adresse = transport.écouter(("127.0.0.1", 0))
+        lecteur = contexte.Process(target=nœud_lecteur,
+                                   args=(adresse, 100, reçus))
+        lecteur.start()
+        try:
+            self.assertTrue(transport.attendre(1, 10.0))
+            self.assertEqual(coton.GM.compiler(), [])
+            coton.GM.démarrer()
+            self.assertEqual([reçus.get(timeout=10.0) for _ in range(100)],
+                             list(range(1, 101)))
+            lecteur.join(10.0)
+        finally:
+            coton.arrêter()
+            coton.GM.attendre(5.0)
+            transport.fermer()
+            lecteur.join(1.0)
+
+    def test_authentification(self):
+        coton.réinitialiser()
+        transport = Transport("serveur", clé=b"clef")
+        adresse = transport.écouter(("127.0.0.1", 0))
+        intrus = Transport("intrus", clé=b"autre clef")
+        intrus.connecter(adresse, période=0.05)
+        try:
+            self.assertFalse(transport.attendre(1, 0.5))
+            self.assertFalse(intrus.attendre(1, 0.1))
+        finally:
+            intrus.fermer()
+        pair = Transport("pair", clé=b"clef")
+        pair.connecter(adresse, période=0.05)
+        try:
+            self.assertTrue(transport.attendre(1, 5.0))
+        finally:
+            pair.fermer()
+            transport.fermer()
+
+    def test_reconnexion(self):
+        coton.réinitialiser()
+
+        class Source(metaclass=coton.MétaActeur):
+            valeur = coton.send_msg("Valeur")
+
+        transport = Transport("source", capacité=2)
+        adresse = transport.écouter(("127.0.0.1", 0))
+
+        # Un second transport du même système tient lieu de système distant,
+        # consommateur des valeurs : il les remet à la Source
+        def pair():
+            t = Transport("pair")
+            t._topologie = lambda: {"nom": "pair", "consommés": ["valeur"],
+                                    "produits": []}
+            t.connecter(adresse, période=0.05)
+            return t
+
+        distant = pair()
+        try:
+            self.assertTrue(transport.attendre(1, 5.0))
+            lien = transport._liens["@pair"]
+            distant.fermer()
+            échéance = time.monotonic() + 5.0
+            while lien.connecté() and time.monotonic() < échéance:
+                time.sleep(0.01)
+            self.assertFalse(lien.connecté())
+
+            for i in range(5):
+                coton.GM.transmettre("Source", "valeur", i)
+            distant = pair()
+            self.assertTrue(transport.attendre(1, 5.0))
+            self.assertIs(transport._liens["@pair"], lien)
+
+            boîte = coton.GM._files["Source"]
+            while boîte.qsize() < 2 and time.monotonic() < échéance:
+                time.sleep(0.01)
+            codec = coton.GM.codec("valeur")
+            self.assertEqual([codec.décoder(boîte.get()[1]) for _ in range(2)],
+                             [3, 4])
+        finally:
+            distant.fermer()
+            transport.fermer()
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_niveau(self):
+        traceur = coton.trace.Traceur()
+        puits = coton.trace.PuitsAnneau(2)
+        traceur.configurer(coton.trace.INFO, puits)
+        traceur.tracer(coton.trace.DÉTAIL, "{} → {}", "A", "x")
+        self.assertEqual(len(puits), 0)
+        for i in range(3):
+            traceur.tracer(coton.trace.INFO, "{} → {}", "A", i)
+        self.assertEqual([e.args[1] for e in puits], [1, 2])
+
+        flux = io.StringIO()
+        puits.vider(flux)
+        self.assertTrue(flux.getvalue().endswith("INFO: A → 2\n"))
+        self.assertEqual(len(puits), 0)
+
+    def test_flux(self):
+        traceur = coton.trace.Traceur()
+        flux = io.StringIO()
+        traceur.configurer(coton.trace.DÉTAIL, coton.trace.PuitsFlux(flux))
+        traceur.tracer(coton.trace.DÉTAIL, "{} → {}", "A", "x")
+        traceur.configurer(coton.trace.AUCUN, None)
+        self.assertIn("DÉTAIL: A → x", flux.getvalue())
+
+    def test_reconfigurer(self):
+        traceur = coton.trace.Traceur()
+        niveaux = list()
+
+        class Puits(coton.trace.PuitsAnneau):
+            def fermer(self):
+                niveaux.append((traceur.niveau, traceur.puits))
+
+        traceur.configurer(coton.trace.DÉTAIL, Puits())
+        traceur.configurer(coton.trace.AUCUN, None)
+        self.assertEqual(niveaux, [(coton.trace.AUCUN, None)])
+
+
+def système_compteur(cible, attente=None, reçus=None):
+    """Producteur autonome d'un compteur, et consommateur s'arrêtant une
+    fois la cible atteinte
+    """
+    coton.réinitialiser()
+    if reçus is None:
+        reçus = list()
+
+    class Compteur(metaclass=coton.MétaActeur):
+        valeur = coton.send_msg("Compteur", 0, immediate=True)
+
+        if attente is None:
+            @coton.entry
+            def compter(self):
+                self.valeur += 1
+        else:
+            @coton.entry
+            async def compter(self):
+                await attente()
+                self.valeur += 1
+
+    class Lecteur(metaclass=coton.MétaActeur):
+        valeur = coton.recv_msg("Compteur", 0)
+
+        @coton.entry(valeur)
+        def lire(self):
+            if isinstance(reçus, list):
+                reçus.append(self.valeur)
+            else:
+                reçus.put(self.valeur)
+            if self.valeur == cible:
+                coton.arrêter()
+
+    return reçus
+
+
+class TestOrdonnanceur(unittest.TestCase):
+
+    def tearDown(self):
+        coton.réinitialiser()
+
+    def test_tâches(self):
+        reçus = système_compteur(100)
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(reçus[:100], list(range(1, 101)))
+
+    def test_mesures(self):
+        système_compteur(100)
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        m = coton.mesures()
+        self.assertGreaterEqual(m["acteurs"]["Compteur"]["émis"], 100)
+        self.assertGreaterEqual(m["acteurs"]["Lecteur"]["reçus"], 100)
+        self.assertGreaterEqual(
+            m["acteurs"]["Lecteur"]["activations"]["valeur"]["nombre"], 100)
+        self.assertGreaterEqual(
+            m["acteurs"]["Compteur"]["activations"]["compter"]["nombre"], 100)
+        self.assertGreaterEqual(m["échanges"]["valeur"]["livraisons"], 100)
+
+    def test_réserve(self):
+        reçus = système_compteur(100)
+        coton.GM.démarrer(OrdonnanceurRéserve(3))
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(reçus[:100], list(range(1, 101)))
+
+    def test_réserve_exception(self):
+        reçus = système_compteur(100)
+
+        class Défaillant(metaclass=coton.MétaActeur):
+            valeur = coton.recv_msg("Compteur", 0)
+
+            @coton.entry(valeur)
+            def échouer(self):
+                raise ValueError("défaillance")
+
+        erreurs = io.StringIO()
+        with contextlib.redirect_stderr(erreurs):
+            coton.GM.démarrer(OrdonnanceurRéserve(1))
+            self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(reçus[:100], list(range(1, 101)))
+        self.assertIn("ERREUR : exception de l'Acteur 'Défaillant'",
+                      erreurs.getvalue())
+        self.assertIn("ValueError: défaillance", erreurs.getvalue())
+
+    def test_réserve_exclusion(self):
+        coton.réinitialiser()
+        actifs = list()
+        conflits = list()
+
+        class Source1(metaclass=coton.MétaActeur):
+            valeur = coton.send_msg("Compteur", 0, immediate=True)
+
+            @coton.entry
+            def compter(self):
+                self.valeur += 1
+
+        class Source2(metaclass=coton.MétaActeur):
+            valeur = coton.send_msg("Compteur", 0, immediate=True)
+
+            @coton.entry
+            def compter(self):
+                self.valeur += 1
+
+        class Puits(metaclass=coton.MétaActeur):
+            valeur = coton.recv_msg("Compteur", 0)
+
+            def __init__(self):
+                self.nb = 0
+
+            @coton.entry(valeur)
+            def lire(self):
+                actifs.append(self)
+                if len(actifs) > 1:
+                    conflits.append(self.valeur)
+                time.sleep(0.0001)
+                self.nb += 1
+                actifs.pop()
+                if self.nb == 200:
+                    coton.arrêter()
+
+        coton.GM.démarrer(OrdonnanceurRéserve(4, quota=2))
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(conflits, [])
+
+    def test_horloge_virtuelle(self):
+        coton.réinitialiser()
+        coton.définir_horloge(coton.HorlogeVirtuelle())
+        reçus = list()
+
+        class Métronome(metaclass=coton.MétaActeur):
+            tic = coton.send_msg("Heure", 0, immediate=True)
+
+            @coton.entry
+            def battre(self):
+                coton.dormir(60.0)
+                self.tic += 1
+
+        class Observateur(metaclass=coton.MétaActeur):
+            tic = coton.recv_msg("Heure", 0)
+
+            @coton.entry(tic)
+            def observer(self):
+                reçus.append((self.tic, coton.heure()))
+                if self.tic == 1000:
+                    coton.arrêter()
+
+        t0 = time.monotonic()
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertLess(time.monotonic() - t0, 5.0)
+        self.assertEqual(reçus[:1000],
+                         [(i, 60.0 * i) for i in range(1, 1001)])
+
+    def test_minuteur(self):
+        coton.réinitialiser()
+        coton.définir_horloge(coton.HorlogeVirtuelle())
+        reçus = list()
+
+        class Métronome(metaclass=coton.MétaActeur):
+            tic = coton.send_msg("Heure", 0)
+
+            @coton.entry(every=0.5)
+            def battre(self):
+                self.tic += 1
+
+            @coton.entry(after=2.25)
+            def sonner(self):
+                reçus.append(("sonnerie", coton.heure()))
+
+        class Observateur(metaclass=coton.MétaActeur):
+            tic = coton.recv_msg("Heure", 0)
+
+            @coton.entry(tic)
+            def observer(self):
+                reçus.append((self.tic, coton.heure()))
+                if self.tic == 6:
+                    coton.arrêter()
+
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(reçus, [(1, 0.5), (2, 1.0), (3, 1.5), (4, 2.0),
+                                 ("sonnerie", 2.25), (5, 2.5), (6, 3.0)])
+
+    def test_minuteur_réglage_heure(self):
+        coton.réinitialiser()
+        reçus = list()
+
+        class HorlogeReculant(coton.HorlogeRéelle):
+            def heure(self):
+                return time.time() - 3600.0 * len(reçus)
+
+        coton.définir_horloge(HorlogeReculant())
+
+        class Métronome(metaclass=coton.MétaActeur):
+            @coton.entry(every=0.01)
+            def battre(self):
+                reçus.append(coton.heure())
+                if len(reçus) == 20:
+                    coton.arrêter()
+
+        t0 = time.monotonic()
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertLess(time.monotonic() - t0, 2.0)
+
+    def test_minuteur_boîte_pleine(self):
+        coton.réinitialiser()
+        reçus = list()
+
+        class Lent(metaclass=coton.MétaActeur):
+            @coton.entry(every=0.001)
+            def traîner(self):
+                time.sleep(0.01)
+
+        class Métronome(metaclass=coton.MétaActeur):
+            @coton.entry(every=0.01)
+            def battre(self):
+                reçus.append(coton.heure())
+                if len(reçus) == 20:
+                    coton.arrêter()
+
+        coton.limiter(Lent, 1, coton.BLOQUER)
+        t0 = time.monotonic()
+        coton.GM.démarrer()
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertLess(time.monotonic() - t0, 2.0)
+
+    def test_minuteur_temps_réel(self):
+        coton.réinitialiser()
+        reçus = list()
+
+        class Métronome(metaclass=coton.MétaActeur):
+            @coton.entry(every=0.01)
+            def battre(self):
+                reçus.append(coton.heure())
+                if len(reçus) == 20:
+                    coton.arrêter()
+
+        coton.répliquer(Métronome, 3)
+        coton.GM.démarrer("réserve")
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertGreaterEqual(len(reçus), 20)
+        self.assertEqual([t.name for t in threading.enumerate()
+                          if t.name == "minuteur"], [])
+
+    def test_coopération(self):
+        for ordonnanceur in ("tâches", OrdonnanceurRéserve(1), "asyncio"):
+            coton.réinitialiser()
+            échos = list()
+
+            class Métronome(metaclass=coton.MétaActeur):
+                tic = coton.send_msg("Tic", 0, immediate=True)
+
+                @coton.entry
+                def battre(self):
+                    for _ in range(5):
+                        yield coton.Délai(0.01)
+                        self.tic += 1
+                    yield coton.Réception()
+
+            class Écho(metaclass=coton.MétaActeur):
+                tic = coton.recv_msg("Tic", 0)
+                écho = coton.send_msg("Écho", 0, immediate=True)
+
+                @coton.entry
+                def répéter(self):
+                    while True:
+                        yield coton.Réception("tic")
+                        échos.append(self.tic)
+                        self.écho = self.tic
+
+            class Arbitre(metaclass=coton.MétaActeur):
+                écho = coton.recv_msg("Écho", 0)
+
+                @coton.entry
+                def arbitrer(self):
+                    yield coton.Condition(lambda a: a.écho == 5)
+                    coton.arrêter()
+
+            coton.GM.démarrer(ordonnanceur)
+            self.assertTrue(coton.GM.attendre(10.0))
+            self.assertEqual(échos, [1, 2, 3, 4, 5])
+
+    def test_asyncio(self):
+        reçus = système_compteur(100)
+        coton.GM.démarrer("asyncio")
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(reçus[:100], list(range(1, 101)))
+
+    def test_asyncio_coroutine(self):
+        reçus = système_compteur(5, lambda: asyncio.sleep(0.001))
+        coton.GM.démarrer("asyncio")
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual(reçus[:5], [1, 2, 3, 4, 5])
+
+    def test_asyncio_exception(self):
+        système_compteur(3)
+
+        class Défaillant(metaclass=coton.MétaActeur):
+            valeur = coton.recv_msg("Compteur", 0)
+
+            @coton.entry(valeur)
+            def échouer(self):
+                raise ValueError("défaillance")
+
+        with self.assertLogs("asyncio", level="ERROR") as journaux:
+            coton.GM.démarrer("asyncio")
+            self.assertTrue(coton.GM.attendre(10.0))
+        self.assertIn("Exception de l'acteur 'Défaillant'",
+                      journaux.output[0])
+
+    def test_processus(self):
+        reçus = multiprocessing.get_context("fork").Queue()
+        système_compteur(100, reçus=reçus)
+        coton.GM.démarrer(OrdonnanceurProcessus(["Compteur"]))
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual([reçus.get(timeout=1.0) for _ in range(100)],
+                         list(range(1, 101)))
+
+    def test_processus_tous(self):
+        reçus = multiprocessing.get_context("fork").Queue()
+        système_compteur(100, reçus=reçus)
+        coton.GM.démarrer("processus")
+        self.assertTrue(coton.GM.attendre(10.0))
+        self.assertEqual([reçus.get(timeout=1.0) for _ in range(100)],
+                         list(range(1, 101)))
+
 
 if __name__ == "__main__":
     unittest.main()